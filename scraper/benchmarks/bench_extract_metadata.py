@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: AkwamScraper._extract_metadata مقابل التنفيذ القديم
+Measures per-page CPU time of the shared MetadataExtractor against the
+previous one-regex-at-a-time implementation, and checks both give the
+same result.
+
+    python benchmarks/bench_extract_metadata.py [--page FILE.html] [--iterations N]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sources.akwam import AkwamScraper
+
+
+def sample_page(episodes: int = 120) -> str:
+    """صفحة مسلسل شبه صفحات أكوام لو مفيش صفحة متسجلة"""
+    nav = ''.join(f'<li><a href="/series?section={i}">قسم {i}</a></li>' for i in range(60))
+    eps = ''.join(
+        f'<div class="col-lg-4"><a href="https://ak.sv/episode/{9000 + i}/series/الحلقة-{i}">'
+        f'<img src="https://img.downet.net/thumb/178x260/uploads/ep{i}.jpg"></a>'
+        f'<p class="entry-date">الخميس 0{i % 9 + 1} أكتوبر 2025 - 05:43 صباحا</p></div>'
+        for i in range(1, episodes + 1))
+    return f"""<html><head><title>مسلسل | اكوام</title>
+<script type="application/ld+json">{{"@context":"https://schema.org","@type":"TVSeries","name":"مسلسل"}}</script>
+<script type="application/ld+json">[{{"@type":"BreadcrumbList"}},{{"@type":"TVSeries","AggregateRating":{{"ratingValue":"7.4"}}}}]</script>
+</head><body><nav><ul>{nav}</ul></nav>
+<h1>مسلسل المدينة البعيدة | اكوام</h1>
+<div class="widget-body">
+<div class="font-size-16">اللغة : التركية</div>
+<div class="font-size-16">الترجمة : العربية</div>
+<div class="font-size-16">الجودة : WEB-DL - 1080p</div>
+<div class="font-size-16">انتاج : تركيا</div>
+<div class="font-size-16">السنة : 2025</div>
+<div class="font-size-16">مدة المسلسل : 141 دقيقة</div>
+<span class="badge">PG13</span>
+<p>{'تدور أحداث المسلسل حول عائلة تواجه صراعات كبيرة. ' * 8}</p>
+</div>
+{eps}
+<footer>{'جميع الحقوق محفوظة ' * 40}</footer>
+</body></html>"""
+
+
+def legacy_extract_metadata(soup: BeautifulSoup, info: Dict):
+    """استخراج الميتاداتا من صفحة المسلسل"""
+
+    # البحث في كل النصوص
+    page_text = soup.get_text()
+
+    # === السنة ===
+    # البحث عن "السنة : 2024" أو "year: 2024"
+    year_patterns = [
+        r'السنة\s*[:\s]+\s*(\d{4})',
+        r'سنة الانتاج\s*[:\s]+\s*(\d{4})',
+        r'الإنتاج\s*[:\s]+\s*(\d{4})',
+        r'year\s*[:\s]+\s*(\d{4})',
+    ]
+    for pattern in year_patterns:
+        match = re.search(pattern, page_text)
+        if match:
+            info['year'] = match.group(1)
+            break
+
+    # === البلد/الانتاج ===
+    country_patterns = [
+        r'انتاج\s*[:\s]+\s*([^\n\r]+)',
+        r'الانتاج\s*[:\s]+\s*([^\n\r]+)',
+        r'بلد الانتاج\s*[:\s]+\s*([^\n\r]+)',
+        r'country\s*[:\s]+\s*([^\n\r]+)',
+    ]
+    for pattern in country_patterns:
+        match = re.search(pattern, page_text, re.IGNORECASE)
+        if match:
+            country = match.group(1).strip()
+            # تنظيف النص
+            country = re.sub(r'\s+', ' ', country)
+            if len(country) < 50:  # تجنب النصوص الطويلة
+                info['country'] = country.split()[0] if country else ''
+            break
+
+    # === اللغة ===
+    lang_patterns = [
+        r'اللغة\s*[:\s]+\s*([^\n\r]+)',
+        r'language\s*[:\s]+\s*([^\n\r]+)',
+    ]
+    for pattern in lang_patterns:
+        match = re.search(pattern, page_text, re.IGNORECASE)
+        if match:
+            lang = match.group(1).strip()
+            if len(lang) < 30:
+                info['language'] = lang.split()[0] if lang else ''
+            break
+
+    # === الجودة ===
+    quality_patterns = [
+        r'الجودة\s*[:\s]+\s*([^\n\r]+)',
+        r'quality\s*[:\s]+\s*([^\n\r]+)',
+    ]
+    for pattern in quality_patterns:
+        match = re.search(pattern, page_text, re.IGNORECASE)
+        if match:
+            quality = match.group(1).strip()
+            # استخراج الجودة فقط (مثل 720p, 1080p, WEB-DL)
+            quality_match = re.search(r'(\d+p|WEB-?DL|BluRay|HDRip|DVDRip)', quality, re.IGNORECASE)
+            if quality_match:
+                info['quality'] = quality_match.group(1)
+            break
+
+    # === المدة ===
+    duration_patterns = [
+        r'مدة المسلسل\s*[:\s]+\s*([^\n\r]+)',
+        r'المدة\s*[:\s]+\s*([^\n\r]+)',
+        r'duration\s*[:\s]+\s*([^\n\r]+)',
+    ]
+    for pattern in duration_patterns:
+        match = re.search(pattern, page_text, re.IGNORECASE)
+        if match:
+            duration = match.group(1).strip()
+            # استخراج الدقائق
+            dur_match = re.search(r'(\d+)\s*دقيقة', duration)
+            if dur_match:
+                info['duration'] = f"{dur_match.group(1)} دقيقة"
+            else:
+                dur_match = re.search(r'(\d+)\s*min', duration, re.IGNORECASE)
+                if dur_match:
+                    info['duration'] = f"{dur_match.group(1)} min"
+            break
+
+    # === التقييم من JSON-LD Schema ===
+    # البحث عن AggregateRating في JSON-LD
+    script_tags = soup.select('script[type="application/ld+json"]')
+    for script in script_tags:
+        try:
+            json_text = script.get_text(strip=True)
+            # قد يكون array أو object
+            if json_text.startswith('['):
+                json_data = json.loads(json_text)
+                for item in json_data:
+                    if isinstance(item, dict) and 'AggregateRating' in item:
+                        rating_val = item['AggregateRating'].get('ratingValue')
+                        if rating_val:
+                            info['rating'] = float(rating_val)
+                            break
+            else:
+                json_data = json.loads(json_text)
+                if isinstance(json_data, dict) and 'AggregateRating' in json_data:
+                    rating_val = json_data['AggregateRating'].get('ratingValue')
+                    if rating_val:
+                        info['rating'] = float(rating_val)
+        except:
+            pass
+
+    # Fallback: البحث في النص
+    if info['rating'] == 0.0:
+        rating_patterns = [
+            r'"ratingValue"\s*:\s*"?(\d+\.?\d*)"?',
+            r'(\d+\.?\d*)\s*/\s*10',
+            r'التقييم\s*[:\s]+\s*(\d+\.?\d*)',
+        ]
+        for pattern in rating_patterns:
+            match = re.search(pattern, page_text, re.IGNORECASE)
+            if match:
+                try:
+                    rating = float(match.group(1))
+                    if 0 < rating <= 10:
+                        info['rating'] = rating
+                        break
+                except:
+                    pass
+
+    # === تصنيف العمر ===
+    age_patterns = [
+        r'(PG-?\d+|R|G|NC-17)',
+        r'للكبار فقط',
+        r'عائلي',
+    ]
+    for pattern in age_patterns:
+        match = re.search(pattern, page_text, re.IGNORECASE)
+        if match:
+            info['age_rating'] = match.group(0)
+            break
+
+
+_akwam = None
+
+
+def new_extract_metadata(soup: BeautifulSoup, info: Dict):
+    global _akwam
+    if _akwam is None:
+        _akwam = AkwamScraper()
+    _akwam._extract_metadata(soup, info)
+
+
+def empty_info() -> Dict:
+    return {'year': '', 'country': '', 'language': '', 'quality': '', 'duration': '',
+            'rating': 0.0, 'age_rating': ''}
+
+
+def bench(fn, soup: BeautifulSoup, iterations: int) -> float:
+    """Median CPU seconds per page"""
+    samples = []
+    for _ in range(iterations):
+        info = empty_info()
+        start = time.process_time()
+        fn(soup, info)
+        samples.append(time.process_time() - start)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark metadata extraction')
+    parser.add_argument('--page', help='Recorded Akwam series page (HTML)')
+    parser.add_argument('--iterations', '-n', type=int, default=200)
+    args = parser.parse_args()
+
+    html = Path(args.page).read_text(encoding='utf-8') if args.page else sample_page()
+    soup = BeautifulSoup(html, 'lxml')
+
+    old_info, new_info = empty_info(), empty_info()
+    legacy_extract_metadata(soup, old_info)
+    new_extract_metadata(soup, new_info)
+    if old_info != new_info:
+        print(f"[MISMATCH]\n  legacy: {old_info}\n  new:    {new_info}")
+        sys.exit(1)
+
+    legacy_time = bench(legacy_extract_metadata, soup, args.iterations)
+    new_time = bench(new_extract_metadata, soup, args.iterations)
+    print(f"Page: {args.page or 'synthetic'} ({len(html) // 1024} KB)")
+    print(f"Result: {json.dumps(new_info, ensure_ascii=False)}")
+    print(f"legacy: {legacy_time * 1000:.3f} ms/page")
+    print(f"new:    {new_time * 1000:.3f} ms/page ({legacy_time / new_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
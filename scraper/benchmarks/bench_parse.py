@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parse-only throughput على صفحات الـ fixtures
+Runs the real scraper entry points (get_series_info, get_episodes_list,
+_get_watch_servers, _get_download_servers) against the recorded pages with
+the network replaced by the fixture text, so only decoding, parsing and
+extraction are timed. Results are appended to
+scraper/.cache/benchmarks/results.jsonl and compared with the previous run.
+
+    python benchmarks/bench_parse.py [--iterations N] [--case akwam_series] [--no-record]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sources.base import BaseScraper
+from sources.akwam import AkwamScraper
+from sources.arabseed import ArabSeedScraper
+from history import RESULTS_FILE, print_comparison, record
+from mock_site import FIXTURES_DIR
+
+AKWAM_URL = 'https://ak.sv/series/5079/المدينة-البعيدة-الموسم-الثاني'
+ARABSEED_URL = 'https://a.asd.homes/مسلسل-المدينة-البعيدة-الموسم-الثاني-الحلقة-70/'
+
+
+def offline(scraper: BaseScraper, fixture: str) -> BaseScraper:
+    """Serve every fetch of this scraper from one fixture page"""
+    html = (FIXTURES_DIR / fixture).read_text(encoding='utf-8')
+    scraper._fetch = lambda url, retries: html
+    return scraper
+
+
+def cases() -> List[Tuple[str, str, Callable[[], object]]]:
+    akwam = offline(AkwamScraper(), 'akwam_series.html')
+    series = offline(ArabSeedScraper(), 'arabseed_episode.html')
+    watch = offline(ArabSeedScraper(), 'arabseed_watch.html')
+    download = offline(ArabSeedScraper(), 'arabseed_download.html')
+    return [
+        ('akwam_series', 'akwam_series.html', lambda: akwam.get_series_info(AKWAM_URL)),
+        ('arabseed_series', 'arabseed_episode.html', lambda: series.get_series_info(ARABSEED_URL)),
+        ('arabseed_episodes', 'arabseed_episode.html', lambda: series.get_episodes_list(ARABSEED_URL)),
+        ('arabseed_watch', 'arabseed_watch.html', lambda: watch._get_watch_servers(ARABSEED_URL + 'watch/')),
+        ('arabseed_download', 'arabseed_download.html',
+         lambda: download._get_download_servers(ARABSEED_URL + 'download/')),
+    ]
+
+
+def bench(fn: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """pages/sec over the whole loop plus the median ms per page"""
+    samples = []
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        # أول نداء تسخين وتأكد إن الصفحة لسه بتطابق الـ selectors
+        if not fn():
+            raise SystemExit("[MISMATCH] fixture produced no result - check the page against the selectors")
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {'pages_per_sec': round(len(samples) / sum(samples), 2),
+            'median_ms': round(samples[len(samples) // 2] * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parse-only throughput on recorded pages')
+    parser.add_argument('--iterations', '-n', type=int, default=100)
+    parser.add_argument('--case', action='append', help='Only run these cases')
+    parser.add_argument('--results', default=str(RESULTS_FILE), help='History file (JSONL)')
+    parser.add_argument('--no-record', action='store_true', help="Don't append to the history file")
+    args = parser.parse_args()
+
+    # البنشمارك مش محتاج بروكسيات ولا كاش
+    BaseScraper._proxy_loaded = True
+    BaseScraper.http_cache = None
+
+    results = {}
+    for name, fixture, fn in cases():
+        if args.case and name not in args.case:
+            continue
+        results[name] = bench(fn, args.iterations)
+        size = (FIXTURES_DIR / fixture).stat().st_size // 1024
+        print(f"{name:<22} {fixture:<24} {size:>4} KB  "
+              f"{results[name]['pages_per_sec']:>8.1f} pages/sec  {results[name]['median_ms']:>8.3f} ms/page")
+
+    if not args.no_record:
+        params = {'iterations': args.iterations, 'cases': sorted(results)}
+        print_comparison(results, record('parse', params, results, Path(args.results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end scrape_series throughput ضد مواقع محلية وهمية
+Starts one MockSite per source (so the per-host connection cap and rate
+limiter behave as they do against ak.sv and a.asd.homes), points a
+throw-away config and data dir at them and times SeriesScraper.scrape_series
+for every series. The first pass runs with a cold HTTP cache; later passes
+revalidate with ETags and get 304s. Results are appended to
+scraper/.cache/benchmarks/results.jsonl and compared with the previous run.
+
+    python benchmarks/bench_scrape.py [--series N] [--workers N] [--latency-ms MS] [--error-rate R] [--passes N] [--parse-workers N]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from history import RESULTS_FILE, print_comparison, record
+from mock_site import MockSite
+
+
+def make_config(root: Path, akwam_base: str, arabseed_base: str, args) -> Path:
+    settings = {
+        'episode_workers': args.episode_workers,
+        'parse_workers': args.parse_workers,
+        'rate_limits': {'default': {'rate': args.rate, 'burst': max(1, int(args.rate))}},
+        'proxy_pool': {'validate': False},
+        'http_cache': {'enabled': not args.no_cache, 'dir': str(root / 'http')},
+        'metrics': {'enabled': False},
+    }
+    series = [{
+        'id': str(9000 + i), 'name': f'مسلسل {i}', 'enabled': True,
+        'sources': {
+            'akwam': {'url': f"{akwam_base}/series/{9000 + i}/مسلسل-{i}"},
+            'arabseed': {'url': f"{arabseed_base}/selary/series-{i}/"},
+        }
+    } for i in range(1, args.series + 1)]
+    path = root / 'config.json'
+    path.write_text(json.dumps({'settings': settings, 'sources': {}, 'series': series},
+                               ensure_ascii=False, indent=2), encoding='utf-8')
+    return path
+
+
+def run_pass(scraper, sites: List[MockSite], workers: int) -> Dict[str, Any]:
+    for site in sites:
+        site.reset_stats()
+    series = [s for s in scraper.config['series'] if s.get('enabled', True)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda s: scraper.scrape_series(s, force_all=True), series))
+    elapsed = time.perf_counter() - start
+    episodes = sum(r.get('total_episodes', 0) for r in results if r)
+    statuses: Dict[str, int] = {}
+    for site in sites:
+        for status, count in site.reset_stats().items():
+            statuses[status] = statuses.get(status, 0) + count
+    requests = sum(statuses.values())
+    return {
+        'seconds': round(elapsed, 3),
+        'series_per_sec': round(len(series) / elapsed, 3),
+        'episodes_per_sec': round(episodes / elapsed, 2),
+        'requests_per_sec': round(requests / elapsed, 2),
+        'requests': requests,
+        'not_modified': statuses.get('304', 0),
+        'errors': statuses.get('500', 0),
+        'failed_series': sum(1 for r in results if not r or not r.get('total_episodes')),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark end-to-end scrape_series against local mock sites')
+    parser.add_argument('--series', type=int, default=8, help='Number of series in the generated config')
+    parser.add_argument('--workers', type=int, default=4, help='Series scraped in parallel')
+    parser.add_argument('--episode-workers', type=int, default=4)
+    parser.add_argument('--parse-workers', type=int, default=0, help='Parse pool processes (0 = inline)')
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate', type=float, default=1000, help='Rate limit per host (requests/sec)')
+    parser.add_argument('--passes', type=int, default=2, help='Pass 2+ revalidates the warm HTTP cache')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the HTTP cache (no 304s)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--log-level', default='INFO', help='Scraper log level (output goes to /dev/null)')
+    parser.add_argument('--results', default=str(RESULTS_FILE), help='History file (JSONL)')
+    parser.add_argument('--no-record', action='store_true', help="Don't append to the history file")
+    args = parser.parse_args()
+
+    import main as runner
+    from sources.base import BaseScraper
+    from utils.log import shutdown_logging
+    # البنشمارك بيكلم السيرفرات المحلية مباشرة من غير بروكسيات
+    BaseScraper._proxy_loaded = True
+
+    sites = [MockSite('https://ak.sv', args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed),
+             MockSite('https://a.asd.homes', args.latency_ms, args.jitter_ms, args.error_rate,
+                      seed=args.seed + 1)]
+    with tempfile.TemporaryDirectory(prefix='bench-scrape-') as tmp, sites[0], sites[1], \
+            open(os.devnull, 'w', encoding='utf-8') as devnull:
+        root = Path(tmp)
+        config_path = make_config(root, sites[0].base_url, sites[1].base_url, args)
+        # اللوج بيتكتب في /dev/null بنفس تكلفته الحقيقية (format + queue + write)
+        with contextlib.redirect_stdout(devnull):
+            scraper = runner.SeriesScraper(config_path=str(config_path), new_only=False,
+                                           workers=args.workers, data_dir=str(root / 'data'),
+                                           log_level=args.log_level)
+
+        results = {}
+        for n in range(1, args.passes + 1):
+            name = 'cold' if n == 1 else f'warm_{n - 1}'
+            results[name] = run_pass(scraper, sites, args.workers)
+            r = results[name]
+            print(f"{name:<8} {r['seconds']:>8.2f}s  {r['series_per_sec']:>7.2f} series/sec  "
+                  f"{r['episodes_per_sec']:>8.1f} episodes/sec  {r['requests_per_sec']:>8.1f} req/sec  "
+                  f"{r['requests']} requests ({r['not_modified']} x 304, {r['errors']} x 500, "
+                  f"{r['failed_series']} failed series)")
+        shutdown_logging()
+
+    if not args.no_record:
+        params = {k: v for k, v in vars(args).items() if k not in ('results', 'no_record')}
+        print_comparison(results, record('scrape', params, results, Path(args.results)))
+
+
+if __name__ == "__main__":
+    main()
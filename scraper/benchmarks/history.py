@@ -0,0 +1,75 @@
+"""
+Benchmark history - كل تشغيل بيتسجل سطر في results.jsonl عشان نقارن بالتشغيلات اللي فاتت
+One JSON line per run: benchmark name, parameters, git revision and results.
+The file lives in scraper/.cache/ (gitignored) - it is per machine.
+A run is compared with the last earlier run of the same benchmark and
+parameters, so numbers measured under different settings never mix.
+"""
+
+import json
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+RESULTS_FILE = Path(__file__).parent.parent / '.cache' / 'benchmarks' / 'results.jsonl'
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def previous(name: str, params: Dict[str, Any], path: Path = RESULTS_FILE) -> Optional[Dict[str, Any]]:
+    """Latest recorded run of the same benchmark with the same parameters"""
+    last = None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('benchmark') == name and entry.get('params') == params:
+                    last = entry
+    except OSError:
+        return None
+    return last
+
+
+def record(name: str, params: Dict[str, Any], results: Dict[str, Any],
+           path: Path = RESULTS_FILE) -> Optional[Dict[str, Any]]:
+    """Append this run and return the one it should be compared with"""
+    before = previous(name, params, path)
+    entry = {
+        'benchmark': name,
+        'time': datetime.utcnow().isoformat() + 'Z',
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'params': params,
+        'results': results,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return before
+
+
+def print_comparison(results: Dict[str, Dict[str, float]], before: Optional[Dict[str, Any]]):
+    """Print each case's numbers next to the previous run's"""
+    if not before:
+        print("\n[History] First run with these parameters - nothing to compare")
+        return
+    print(f"\n[History] Compared with {before.get('revision') or '?'} ({before['time']})")
+    old_results = before.get('results', {})
+    for case, values in results.items():
+        for key, value in values.items():
+            old = old_results.get(case, {}).get(key)
+            if not isinstance(value, (int, float)) or not old:
+                continue
+            print(f"  {case:<22} {key:<16} {old:>10.2f} -> {value:>10.2f} ({(value - old) / old * 100:+.1f}%)")
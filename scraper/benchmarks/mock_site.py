@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Mock Site - سيرفر محلي بيقدّم صفحات الـ fixtures بدل ak.sv و a.asd.homes
+Serves the recorded pages under benchmarks/fixtures on 127.0.0.1 with
+configurable latency, injected 5xx errors and ETag revalidation (304), so
+the scrapers can be benchmarked end to end without touching the live sites.
+
+    python benchmarks/mock_site.py --origin https://a.asd.homes --latency-ms 80 --error-rate 0.02
+"""
+
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+
+def route(path: str) -> Optional[str]:
+    """Fixture file for a request path (same URL shapes as the live sites)"""
+    path = unquote(urlparse(path).path)
+    if path.rstrip('/').endswith('/watch'):
+        return 'arabseed_watch.html'
+    if path.rstrip('/').endswith('/download'):
+        return 'arabseed_download.html'
+    if path.startswith('/series/'):
+        return 'akwam_series.html'
+    if path.startswith('/selary/') or path.count('/') == 2:
+        # صفحة مسلسل أو حلقة في عرب سيد
+        return 'arabseed_episode.html'
+    return None
+
+
+class MockSite:
+    """Threaded HTTP stand-in for one live origin
+
+    Absolute links to `origin` inside the fixtures are rewritten to the
+    mock's own address, so following them (episode -> /watch/ -> /download/)
+    stays local; on an ArabSeed series page they are nested under that
+    page's path, so each series gets its own episode URLs. Every response is delayed by latency_ms ± jitter_ms, a
+    fraction error_rate of requests fails with 500, and when etag is on a
+    request carrying the current ETag in If-None-Match gets a 304.
+    """
+
+    def __init__(self, origin: str = '', latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0.0, etag: bool = True, seed: Optional[int] = None,
+                 port: int = 0, fixtures_dir: Path = FIXTURES_DIR):
+        self.origin = origin.rstrip('/')
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.etag = etag
+        self.port = port
+        self.fixtures_dir = Path(fixtures_dir)
+        self.stats: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._pages: Dict[str, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def page(self, name: str, prefix: str = '') -> Tuple[bytes, str]:
+        """Fixture body with the origin rewritten to base_url + prefix, plus its ETag"""
+        key = f"{name}|{prefix}"
+        with self._lock:
+            if key not in self._pages:
+                text = (self.fixtures_dir / name).read_text(encoding='utf-8')
+                if self.origin:
+                    text = text.replace(self.origin, self.base_url + prefix)
+                body = text.encode('utf-8')
+                self._pages[key] = (body, f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+            return self._pages[key]
+
+    def _count(self, status: int):
+        with self._lock:
+            self.stats[str(status)] = self.stats.get(str(status), 0) + 1
+
+    def _respond_delay(self) -> bool:
+        """Sleep for this request's latency; True when it should fail"""
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+            failed = self._random.random() < self.error_rate
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+        return failed
+
+    def reset_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def start(self) -> str:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                failed = site._respond_delay()
+                name = route(self.path)
+                if failed or name is None:
+                    status = 500 if failed else 404
+                    self.send_response(status)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    site._count(status)
+                    return
+                path = urlparse(self.path).path
+                prefix = path.rstrip('/') if name == 'arabseed_episode.html' and path.startswith('/selary/') else ''
+                body, etag = site.page(name, prefix)
+                if site.etag and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    site._count(304)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                if site.etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+                site._count(200)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name='mock-site')
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'MockSite':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the benchmark fixtures locally')
+    parser.add_argument('--origin', default='', help='Live origin to rewrite in links (e.g. https://a.asd.homes)')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--no-etag', action='store_true', help='Never answer 304')
+    args = parser.parse_args()
+
+    site = MockSite(args.origin, args.latency_ms, args.jitter_ms, args.error_rate,
+                    etag=not args.no_etag, port=args.port)
+    print(f"[MockSite] Serving {FIXTURES_DIR} on {site.start()} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n[MockSite] {site.stats}")
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
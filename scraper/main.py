@@ -5,34 +5,115 @@ Supports multiple sources (Akwam, ArabSeed) with new-only or full scrape modes
 """
 
 import json
+import logging
 import os
 import sys
-import io
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Set
 
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+# العربي على كونسول ويندوز / CI - نفس الـ stream من غير wrapper جديد فوقه
+for _stream in (sys.stdout, sys.stderr):
+    if hasattr(_stream, 'reconfigure'):
+        _stream.reconfigure(encoding='utf-8', errors='replace')
 sys.path.insert(0, str(Path(__file__).parent))
 
 from sources.akwam import AkwamScraper
 from sources.arabseed import ArabSeedScraper
+from sources.base import BaseScraper
+from utils.catalog import CatalogPager
+from utils.dates import parse_arabic_date
+from utils.feed import ChangeFeed, FeedMatcher
+from utils.changes import ChangeLog
+from utils.fingerprints import FingerprintIndex
+from utils.journal import RunJournal
+from utils.log import configure_logging, get_logger
+from utils.metrics import Metrics
+from utils.publish import Publisher, format_savings
+from utils.scheduler import Scheduler
+from utils.storage import JsonStorage, SqliteStorage
+from utils.writer import JsonWriter
+
+log = get_logger('Scraper')
+akwam_log = get_logger('Akwam')
+arabseed_log = get_logger('ArabSeed')
 
 
 class SeriesScraper:
-    def __init__(self, config_path: str = None, new_only: bool = True):
+    def __init__(self, config_path: str = None, new_only: bool = True, workers: int = 1,
+                 use_cache: bool = True, storage: str = 'json', db_path: str = None,
+                 scheduled: bool = False, max_seconds: float = None, metrics_dir: str = None,
+                 data_dir: str = None, log_level: str = None, log_format: str = None,
+                 feed: bool = False, parse_workers: int = None):
         self.base_dir = Path(__file__).parent.parent
-        self.data_dir = self.base_dir / "data"
+        # data_dir بديل للـ benchmarks وأي تشغيل على شجرة مؤقتة
+        self.data_dir = Path(data_dir) if data_dir else self.base_dir / "data"
         self.config_path = config_path or self.data_dir / "config.json"
         self.new_only = new_only
-
-        (self.data_dir / "series").mkdir(parents=True, exist_ok=True)
-        (self.data_dir / "episodes").mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, workers)
+        self.scheduled = scheduled
+        self.feed = feed
+        # الميزانية بتتحسب من بداية البرنامج (اختبار البروكسيات جزء منها)
+        self.started = time.monotonic()
+        self.max_seconds = max_seconds
 
         self.config = self._load_config()
+        settings = self.config.get('settings', {})
+        if parse_workers is not None:
+            settings = dict(settings, parse_workers=parse_workers)
+        configure_logging(settings.get('logging', {}), level=log_level, fmt=log_format)
+        self.writer = JsonWriter()
+        self.publisher = self._make_publisher(settings.get('publish', {}))
+        self.changes = ChangeLog(self.data_dir, self.writer,
+                                 checkpoint_every=settings.get('changes_checkpoint_every', 20))
+        self.json_storage = JsonStorage(self.data_dir, self.writer, self.publisher, self.changes,
+                                        layout=settings.get('episode_layout', 'files'),
+                                        compat_files=settings.get('episode_files_compat', True))
+        self.catalog = CatalogPager(self.json_storage, page_size=settings.get('catalog_page_size', 50))
+        # ملفات JSON هي اللي التطبيق بيقراها؛ SQLite اختياري وبيتصدّر منه JSON في الآخر
+        self.storage = self.json_storage
+        if storage == 'sqlite':
+            self.storage = SqliteStorage(db_path or Path(__file__).parent / ".cache" / "series.db")
+            if self.storage.is_empty():
+                imported = self.storage.import_json(self.json_storage)
+                get_logger('Storage').info("Imported %d series from %s into %s", imported, self.data_dir,
+                                           self.storage.db_path)
+        self.io_stats = {'episode_reads': 0, 'episode_reads_avoided': 0}
+        self._stats_lock = threading.Lock()
+        self.fingerprints = FingerprintIndex(self.data_dir / "state" / "fingerprints.json")
+        self.journal = RunJournal(self.data_dir / "state" / "journal.jsonl")
+        self.scheduler = Scheduler(self.data_dir / "state" / "schedule.json", self.writer,
+                                   **settings.get('schedule', {}))
+        feed_settings = settings.get('feed', {})
+        self.change_feed = ChangeFeed(self.data_dir / "state" / "feed.json", self.writer,
+                                      full_sweep_hours=feed_settings.get('full_sweep_hours', 24),
+                                      pages=feed_settings.get('pages', 2), urls=feed_settings.get('urls'))
+        BaseScraper.configure(settings, use_cache=use_cache)
+        metrics_settings = settings.get('metrics', {})
+        self.metrics = Metrics() if metrics_settings.get('enabled', True) or metrics_dir else None
+        self.metrics_dir = Path(metrics_dir or metrics_settings.get('dir') or
+                                Path(__file__).parent / ".cache" / "metrics")
+        BaseScraper.metrics = self.metrics
+        self.episode_workers = settings.get('episode_workers', 4)
+        self.deadline_reserve = settings.get('deadline_reserve_seconds', 120)
         self.scrapers = {'akwam': AkwamScraper(), 'arabseed': ArabSeedScraper()}
 
+        self.proxy_settings = settings.get('proxy_pool', {})
+        self._proxies_validated = False
+
+    def _validate_proxies(self):
+        """Probe the proxy pool once per process - only the commands that fetch pages need it"""
+        if self._proxies_validated or not self.proxy_settings.get('validate', True):
+            return
+        self._proxies_validated = True
+        self.scrapers['akwam'].validate_proxies(
+            workers=self.proxy_settings.get('probe_workers', 20),
+            timeout=self.proxy_settings.get('probe_timeout_seconds', 8)
+        )
+
     def _load_config(self) -> Dict:
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
@@ -40,42 +121,47 @@ class SeriesScraper:
         except FileNotFoundError:
             return {"series": [], "sources": {}, "settings": {}}
 
-    def _save_json(self, path: Path, data: Dict):
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"[SAVED] {path}")
+    def _save_config(self):
+        # نفس شكل الملف (indent 2) فالـ diff بيبقى السطور الجديدة بس
+        self.writer.write(Path(self.config_path), self.config)
 
-    def _load_json(self, path: Path) -> Optional[Dict]:
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
+    def _make_publisher(self, settings: Dict) -> Optional[Publisher]:
+        if not settings.get('enabled', False):
             return None
+        return Publisher(self.data_dir, self.data_dir / settings.get('dir', 'publish'),
+                         use_gzip=settings.get('gzip', True), use_brotli=settings.get('brotli', True),
+                         compact=settings.get('compact', False))
 
-    def _get_existing_episodes(self, series_id: str) -> Set[int]:
+    def _get_existing_episodes(self, series_id: str, series_data: Optional[Dict] = None) -> Set[int]:
         existing = set()
-        series_path = self.data_dir / "series" / f"{series_id}.json"
-        series_data = self._load_json(series_path)
+        if series_data is None:
+            series_data = self.storage.load_series(series_id)
         if series_data and 'episodes' in series_data:
             for ep in series_data['episodes']:
                 existing.add(ep['number'])
         return existing
 
+    def _load_episode(self, series_id: str, ep_num: int) -> Optional[Dict]:
+        with self._stats_lock:
+            self.io_stats['episode_reads'] += 1
+        return self.storage.load_episode(series_id, ep_num)
+
     def scrape_series(self, series_config: Dict, force_all: bool = False) -> Optional[Dict]:
         series_id = series_config['id']
         series_name = series_config['name']
         mode = 'ALL' if force_all or not self.new_only else 'NEW only'
 
-        print(f"\n{'='*50}\nScraping: {series_name} (ID: {series_id})\nMode: {mode}\n{'='*50}")
+        log.info("Scraping: %s (ID: %s) - mode: %s", series_name, series_id, mode)
+
+        series_data = self.storage.load_series(series_id)
+        series_exists = series_data is not None
 
         existing_episodes = set()
         if self.new_only and not force_all:
-            existing_episodes = self._get_existing_episodes(series_id)
+            existing_episodes = self._get_existing_episodes(series_id, series_data)
             if existing_episodes:
-                print(f"[INFO] Found {len(existing_episodes)} existing episodes")
-
-        series_path = self.data_dir / "series" / f"{series_id}.json"
-        series_data = self._load_json(series_path) or {
+                log.info("Found %d existing episodes", len(existing_episodes))
+        series_data = series_data or {
             'id': series_id, 'title': series_name, 'original_title': '',
             'description': '', 'poster': '', 'backdrop': '', 'year': '',
             'country': '', 'language': '', 'rating': 0.0, 'genres': [],
@@ -84,175 +170,541 @@ class SeriesScraper:
             'last_updated': datetime.utcnow().isoformat() + 'Z', 'episodes': []
         }
 
-        episodes_data = {}
-        for ep in series_data.get('episodes', []):
-            ep_path = self.data_dir / "episodes" / f"{series_id}_{ep['number']:02d}.json"
-            ep_data = self._load_json(ep_path)
-            if ep_data:
-                episodes_data[ep['number']] = ep_data
-
-        # Akwam
+        # === المرحلة 1: جلب قوائم الحلقات من المصادر ===
+        phase_start = time.perf_counter()
         akwam_config = series_config.get('sources', {}).get('akwam', {})
+        arabseed_config = series_config.get('sources', {}).get('arabseed', {})
+        akwam = self.scrapers['akwam']
+        arabseed = self.scrapers['arabseed']
+
+        info = None
         if akwam_config.get('url'):
-            print(f"\n[Akwam] Scraping: {akwam_config['url']}")
-            akwam = self.scrapers['akwam']
+            akwam_log.info("Scraping: %s", akwam_config['url'])
             info = akwam.get_series_info(akwam_config['url'])
-            if info:
-                for k in ['title', 'original_title', 'description', 'poster', 'year',
-                          'country', 'language', 'rating', 'genres', 'tags', 'quality',
-                          'duration', 'cast']:
-                    if info.get(k):
-                        series_data[k] = info[k]
-                new_count = 0
-                for ep in info.get('episodes', []):
+
+        episodes_list = None
+        if arabseed_config.get('url'):
+            arabseed_log.info("Scraping: %s", arabseed_config['url'])
+            try:
+                episodes_list = arabseed.get_episodes_list(arabseed_config['url'])
+                arabseed_log.info("Found %d episodes", len(episodes_list) if episodes_list else 0)
+            except Exception as e:
+                arabseed_log.exception("%s", e)
+
+        phase_start = self._phase_done(series_id, 'fetch', phase_start)
+
+        # === المرحلة 2: مقارنة البصمة - لو مفيش أي تغيير نتخطى الباقي ===
+        fingerprints = {}
+        if info:
+            fingerprints['akwam'] = self.fingerprints.compute(info)
+        if episodes_list:
+            fingerprints['arabseed'] = self.fingerprints.compute(episodes_list)
+        all_fetched = (bool(info) or not akwam_config.get('url')) and \
+                      (bool(episodes_list) or not arabseed_config.get('url'))
+        if self.new_only and not force_all and series_exists and all_fetched and \
+                self.fingerprints.matches(series_id, fingerprints):
+            log.info("Unchanged: %s - episode lists match last run, skipping", series_name)
+            with self._stats_lock:
+                self.io_stats['episode_reads_avoided'] += len(series_data.get('episodes', []))
+            return series_data
+
+        # === المرحلة 3: دمج السيرفرات ===
+        # الحلقات بتتقري من الديسك بس لما نيجي نعدلها
+        known_episodes = {ep['number']: ep for ep in series_data.get('episodes', [])}
+        episodes_data = {}
+
+        # Akwam
+        if info:
+            for k in ['title', 'original_title', 'description', 'poster', 'year',
+                      'country', 'language', 'rating', 'genres', 'tags', 'quality',
+                      'duration', 'cast']:
+                if info.get(k):
+                    series_data[k] = info[k]
+            new_count = 0
+            for ep in info.get('episodes', []):
+                ep_num = ep['number']
+                if self.new_only and not force_all and ep_num in existing_episodes:
+                    continue
+                new_count += 1
+                if ep_num not in episodes_data and ep_num in known_episodes:
+                    loaded = self._load_episode(series_id, ep_num)
+                    if loaded:
+                        episodes_data[ep_num] = loaded
+                if ep_num not in episodes_data:
+                    episodes_data[ep_num] = {
+                        'series_id': series_id, 'series_title': series_data['title'],
+                        'episode_number': ep_num, 'title': f'الحلقة {ep_num}',
+                        'date_added': ep.get('date_added', ''),
+                        'last_updated': datetime.utcnow().isoformat() + 'Z',
+                        'servers': {'watch': [], 'download': []}
+                    }
+                if ep.get('url'):
+                    # إزالة سيرفرات أكوام القديمة قبل إضافة الجديدة
+                    episodes_data[ep_num]['servers']['watch'] = [
+                        s for s in episodes_data[ep_num]['servers']['watch']
+                        if s.get('source') != 'akwam'
+                    ]
+                    episodes_data[ep_num]['servers']['download'] = [
+                        s for s in episodes_data[ep_num]['servers']['download']
+                        if s.get('source') != 'akwam'
+                    ]
+                    servers = akwam.get_episode_servers(ep['url'])
+                    for s in servers.get('watch', []):
+                        episodes_data[ep_num]['servers']['watch'].append({
+                            'name': 'أكوام', 'type': s.get('type', 'redirect'),
+                            'url': s['url'], 'quality': s.get('quality', '720p'), 'source': 'akwam'
+                        })
+                    for s in servers.get('download', []):
+                        episodes_data[ep_num]['servers']['download'].append({
+                            'name': 'أكوام', 'url': s['url'], 'quality': s.get('quality', '720p'),
+                            'size': s.get('size', ''), 'source': 'akwam'
+                        })
+            akwam_log.info("Got %d total, %d new", len(info.get('episodes', [])), new_count)
+
+        # ArabSeed
+        if episodes_list:
+            try:
+                targets = [ep for ep in episodes_list
+                           if not (self.new_only and not force_all and ep['number'] in existing_episodes)]
+                if arabseed_log.isEnabledFor(logging.DEBUG):
+                    for ep in targets:
+                        arabseed_log.debug("Getting servers for episode %d: %s", ep['number'], ep['url'])
+                # صفحات الحلقات بتتجاب بالتوازي، والدمج بيفضل بترتيب الحلقات
+                servers_list = arabseed.get_servers_for_episodes(
+                    [ep['url'] for ep in targets], workers=self.episode_workers)
+                for ep, servers in zip(targets, servers_list):
                     ep_num = ep['number']
-                    if self.new_only and not force_all and ep_num in existing_episodes:
-                        continue
-                    new_count += 1
+                    if ep_num not in episodes_data and ep_num in known_episodes:
+                        loaded = self._load_episode(series_id, ep_num)
+                        if loaded:
+                            episodes_data[ep_num] = loaded
                     if ep_num not in episodes_data:
                         episodes_data[ep_num] = {
                             'series_id': series_id, 'series_title': series_data['title'],
                             'episode_number': ep_num, 'title': f'الحلقة {ep_num}',
-                            'date_added': ep.get('date_added', ''),
-                            'last_updated': datetime.utcnow().isoformat() + 'Z',
+                            'date_added': '', 'last_updated': datetime.utcnow().isoformat() + 'Z',
                             'servers': {'watch': [], 'download': []}
                         }
-                    if ep.get('url'):
-                        # إزالة سيرفرات أكوام القديمة قبل إضافة الجديدة
-                        episodes_data[ep_num]['servers']['watch'] = [
-                            s for s in episodes_data[ep_num]['servers']['watch']
-                            if s.get('source') != 'akwam'
-                        ]
-                        episodes_data[ep_num]['servers']['download'] = [
-                            s for s in episodes_data[ep_num]['servers']['download']
-                            if s.get('source') != 'akwam'
-                        ]
-                        servers = akwam.get_episode_servers(ep['url'])
-                        for s in servers.get('watch', []):
-                            episodes_data[ep_num]['servers']['watch'].append({
-                                'name': 'أكوام', 'type': s.get('type', 'redirect'),
-                                'url': s['url'], 'quality': s.get('quality', '720p'), 'source': 'akwam'
-                            })
-                        for s in servers.get('download', []):
-                            episodes_data[ep_num]['servers']['download'].append({
-                                'name': 'أكوام', 'url': s['url'], 'quality': s.get('quality', '720p'),
-                                'size': s.get('size', ''), 'source': 'akwam'
-                            })
-                print(f"[Akwam] Got {len(info.get('episodes', []))} total, {new_count} new")
-
-        # ArabSeed
-        arabseed_config = series_config.get('sources', {}).get('arabseed', {})
-        if arabseed_config.get('url'):
-            print(f"\n[ArabSeed] Scraping: {arabseed_config['url']}")
-            arabseed = self.scrapers['arabseed']
-            try:
-                episodes_list = arabseed.get_episodes_list(arabseed_config['url'])
-                print(f"[ArabSeed] Found {len(episodes_list) if episodes_list else 0} episodes")
-                if episodes_list:
-                    new_count = 0
-                    for ep in episodes_list:
-                        ep_num = ep['number']
-                        if self.new_only and not force_all and ep_num in existing_episodes:
-                            continue
-                        new_count += 1
-                        if ep_num not in episodes_data:
-                            episodes_data[ep_num] = {
-                                'series_id': series_id, 'series_title': series_data['title'],
-                                'episode_number': ep_num, 'title': f'الحلقة {ep_num}',
-                                'date_added': '', 'last_updated': datetime.utcnow().isoformat() + 'Z',
-                                'servers': {'watch': [], 'download': []}
-                            }
-                        # إزالة سيرفرات عرب سيد القديمة قبل إضافة الجديدة
-                        episodes_data[ep_num]['servers']['watch'] = [
-                            s for s in episodes_data[ep_num]['servers']['watch']
-                            if s.get('source') != 'arabseed'
-                        ]
-                        episodes_data[ep_num]['servers']['download'] = [
-                            s for s in episodes_data[ep_num]['servers']['download']
-                            if s.get('source') != 'arabseed'
-                        ]
-                        print(f"[ArabSeed] Getting servers for episode {ep_num}: {ep['url']}")
-                        servers = arabseed.get_episode_servers(ep['url'])
-                        print(f"[ArabSeed] Episode {ep_num} got {len(servers.get('watch', []))} watch, {len(servers.get('download', []))} download")
-                        for s in servers.get('watch', []):
-                            episodes_data[ep_num]['servers']['watch'].append({
-                                'name': s.get('name', 'عرب سيد'), 'type': s.get('type', 'iframe'),
-                                'url': s['url'], 'direct_url': s.get('direct_url', ''),
-                                'quality': s.get('quality', '720p'), 'source': 'arabseed'
-                            })
-                        for s in servers.get('download', []):
-                            episodes_data[ep_num]['servers']['download'].append({
-                                'name': s.get('name', 'عرب سيد'), 'url': s['url'],
-                                'quality': s.get('quality', '720p'),
-                                'is_direct': s.get('is_direct', False), 'source': 'arabseed'
-                            })
-                    print(f"[ArabSeed] Got {len(episodes_list)} total, {new_count} new")
+                    # إزالة سيرفرات عرب سيد القديمة قبل إضافة الجديدة
+                    episodes_data[ep_num]['servers']['watch'] = [
+                        s for s in episodes_data[ep_num]['servers']['watch']
+                        if s.get('source') != 'arabseed'
+                    ]
+                    episodes_data[ep_num]['servers']['download'] = [
+                        s for s in episodes_data[ep_num]['servers']['download']
+                        if s.get('source') != 'arabseed'
+                    ]
+                    arabseed_log.debug("Episode %d got %d watch, %d download", ep_num,
+                                       len(servers.get('watch', [])), len(servers.get('download', [])))
+                    for s in servers.get('watch', []):
+                        episodes_data[ep_num]['servers']['watch'].append({
+                            'name': s.get('name', 'عرب سيد'), 'type': s.get('type', 'iframe'),
+                            'url': s['url'], 'direct_url': s.get('direct_url', ''),
+                            'quality': s.get('quality', '720p'), 'source': 'arabseed'
+                        })
+                    for s in servers.get('download', []):
+                        episodes_data[ep_num]['servers']['download'].append({
+                            'name': s.get('name', 'عرب سيد'), 'url': s['url'],
+                            'quality': s.get('quality', '720p'),
+                            'is_direct': s.get('is_direct', False), 'source': 'arabseed'
+                        })
+                arabseed_log.info("Got %d total, %d new", len(episodes_list), len(targets))
             except Exception as e:
-                print(f"[ArabSeed] ERROR: {e}")
-                import traceback
-                traceback.print_exc()
-
-        series_data['episodes'] = []
-        for ep_num in sorted(episodes_data.keys()):
-            ep = episodes_data[ep_num]
-            series_data['episodes'].append({
+                arabseed_log.exception("%s", e)
+                # الدمج موقعش - من غير البصمة الـ run الجاي مش هيتخطى المسلسل
+                fingerprints.pop('arabseed', None)
+
+        phase_start = self._phase_done(series_id, 'merge', phase_start)
+
+        # الحلقات اللي متلمستش بتفضل بملخصها القديم من ملف المسلسل
+        for ep_num, ep in episodes_data.items():
+            known_episodes[ep_num] = {
                 'number': ep_num, 'title': ep['title'], 'date_added': ep.get('date_added', ''),
                 'servers_count': len(ep['servers']['watch']) + len(ep['servers']['download'])
-            })
+            }
+        series_data['episodes'] = [known_episodes[n] for n in sorted(known_episodes)]
+        with self._stats_lock:
+            self.io_stats['episode_reads_avoided'] += len(known_episodes) - len(episodes_data)
 
         series_data['total_episodes'] = len(series_data['episodes'])
+        previous_updated = series_data.get('last_updated')
         series_data['last_updated'] = datetime.utcnow().isoformat() + 'Z'
 
-        self._save_json(series_path, series_data)
-        for ep_num, ep_data in episodes_data.items():
-            if not self.new_only or force_all or ep_num not in existing_episodes:
-                self._save_json(self.data_dir / "episodes" / f"{series_id}_{ep_num:02d}.json", ep_data)
+        # كتابات المسلسل الواحد بتتنفذ مع بعض (transaction واحدة في SQLite)
+        with self.storage.batch():
+            if not self.storage.save_series(series_id, series_data) and previous_updated:
+                # المحتوى متغيرش - نسيب last_updated زي ما هو في الملف
+                series_data['last_updated'] = previous_updated
+            for ep_num, ep_data in episodes_data.items():
+                self.storage.save_episode(series_id, ep_num, ep_data)
+        self.fingerprints.update(series_id, fingerprints)
+        self._phase_done(series_id, 'write', phase_start)
 
         return series_data
 
-    def scrape_all(self, force_all: bool = False) -> List[Dict]:
+    def _phase_done(self, series_id: str, phase: str, start: float) -> float:
+        now = time.perf_counter()
+        if self.metrics:
+            self.metrics.observe('scraper_series_phase_seconds', now - start, series=series_id, phase=phase)
+        return now
+
+    def _series_summary(self, data: Dict) -> Dict:
+        """ملخص المسلسل اللي بيتكتب في series.json"""
+        last_date = data['episodes'][-1].get('date_added', '') if data['episodes'] else ''
+        return {
+            'id': data['id'], 'title': data['title'],
+            'original_title': data.get('original_title', ''),
+            'poster': data.get('poster', ''), 'year': data.get('year', ''),
+            'country': data.get('country', ''), 'language': data.get('language', ''),
+            'rating': data.get('rating', 0), 'genres': data.get('genres', []),
+            'tags': data.get('tags', []), 'quality': data.get('quality', ''),
+            'duration': data.get('duration', ''),
+            'episodes_count': data.get('total_episodes', 0),
+            'last_episode': data['episodes'][-1]['number'] if data['episodes'] else 0,
+            'last_episode_date': last_date, 'last_updated': data['last_updated'],
+            'status': data.get('status', 'ongoing')
+        }
+
+    def _scrape_safe(self, cfg: Dict, force_all: bool) -> Optional[Dict]:
+        try:
+            data = self.scrape_series(cfg, force_all=force_all)
+            if data:
+                self.scheduler.record(cfg['id'], data)
+                # التغييرات لازم تبقى على الديسك قبل ما الـ journal يقول إن المسلسل خلص
+                self.changes.sync()
+                self.journal.series_done(cfg['id'], self._series_summary(data))
+            return data
+        except Exception as e:
+            log.exception("%s: %s", cfg['name'], e)
+            return None
+
+    def _load_not_due(self, enabled: List[Dict], not_due: List[int], results: List[Optional[Dict]],
+                      tag: str = 'Schedule'):
+        """المسلسلات اللي ميعادها مجاش (أو الـ feed قال إنها متغيرتش): ملخصها من الديسك من غير أي request"""
+        avoided = 0
+        for i in not_due:
+            results[i] = self.storage.load_series(enabled[i]['id'])
+            # على الأقل صفحة القائمة من كل مصدر، من غير صفحات الحلقات
+            avoided += sum(1 for src in enabled[i].get('sources', {}).values() if src.get('url'))
+        get_logger(tag).info("%d series due, %d not due (%d+ listing requests avoided)",
+                             len(enabled) - len(not_due), len(not_due), avoided)
+
+    def _feed_changed(self, enabled: List[Dict]) -> Optional[Set[str]]:
+        """Series ids the latest-episodes pages say changed since the catalog; None means full sweep"""
+        feed_log = get_logger('Feed')
+        # مع --scheduled الـ schedule هو اللي بيعدي على كل المسلسلات، مفيش full sweep دوري
+        if not self.scheduled and self.change_feed.full_sweep_due():
+            feed_log.info("Full sweep due (every %gh)", self.change_feed.full_sweep_hours)
+            return None
+        feeds = {name: self.scrapers[name].get_latest_episodes(url, self.change_feed.pages)
+                 for name, url in self.change_feed.urls.items() if name in self.scrapers and url}
+        catalog = (self.storage.load_catalog() or {}).get('series', [])
+        last_episodes = {s['id']: s.get('last_episode', 0) for s in catalog}
+        changed = self.change_feed.affected(feeds, FeedMatcher(enabled), last_episodes)
+        if changed is None:
+            feed_log.info("Falling back to %s: %s", 'the schedule' if self.scheduled else 'a full sweep',
+                          self.change_feed.fallback_reason)
+            return None
+        # مسلسل لسه متسحبش قبل كده (جديد في config.json) مالوش ملخص نقارن بيه
+        fresh = {cfg['id'] for cfg in enabled if cfg['id'] not in last_episodes}
+        feed_log.info("%d series changed on %s, %d never scraped", len(changed),
+                      ' + '.join(feeds) or 'no sources', len(fresh - changed))
+        return changed | fresh
+
+    def _by_value(self, enabled: List[Dict], due: List[int]) -> List[int]:
+        """Most valuable first: never-scraped series, then newest last episode, then latest change"""
+        catalog = {s['id']: s for s in (self.storage.load_catalog() or {}).get('series', [])}
+
+        def key(i: int):
+            summary = catalog.get(enabled[i]['id'])
+            if not summary:
+                return (0, 0, 0)
+            date = parse_arabic_date(summary.get('last_episode_date', ''))
+            changed = parse_arabic_date(self.scheduler.entry(enabled[i]['id']).get('last_change', ''))
+            return (1, -(date.timestamp() if date else 0), -(changed.timestamp() if changed else 0))
+        return sorted(due, key=key)
+
+    def _run_with_deadline(self, enabled: List[Dict], order: List[int], force_all: bool,
+                           results: List[Optional[Dict]]) -> List[int]:
+        """Scrape in `order` until the budget runs out; returns the indexes that were deferred
+
+        A series is only started if the slowest of the recent ones would still
+        finish before the deadline (minus deadline_reserve for writing the
+        catalog and state files), so the run stops between series instead of
+        being killed in the middle of one.
+        """
+        deadline = self.started + self.max_seconds - self.deadline_reserve
+        durations: List[float] = []
+        pending = list(order)
+        deferred: List[int] = []
+        running = {}
+
+        def timed(cfg: Dict):
+            start = time.monotonic()
+            return self._scrape_safe(cfg, force_all), time.monotonic() - start
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    expected = max(durations[-5:]) if durations else 0.0
+                    if time.monotonic() + expected > deadline:
+                        deferred, pending = pending, []
+                        get_logger('Deadline').info("Budget of %.0fs reached, deferring %d series",
+                                                    self.max_seconds, len(deferred))
+                        break
+                    i = pending.pop(0)
+                    running[pool.submit(timed, enabled[i])] = i
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)], seconds = future.result()
+                    durations.append(seconds)
+
+        # المؤجل ملخصه من الديسك عشان series.json يفضل كامل، وهيبقى due في التشغيل الجاي
+        for i in deferred:
+            results[i] = self.storage.load_series(enabled[i]['id'])
+        if deferred:
+            names = ', '.join(enabled[i]['name'] for i in deferred[:10])
+            more = f" (+{len(deferred) - 10} more)" if len(deferred) > 10 else ''
+            get_logger('Deadline').info("Deferred: %s%s", names, more)
+        return deferred
+
+    def print_schedule(self):
+        names = {cfg['id']: cfg['name'] for cfg in self.config.get('series', [])}
+        status = self.scheduler.status()
+        print(f"{'ID':<8} {'Every':>7} {'Checks':>6}  {'Next due':<20} Name")
+        for series_id, entry in sorted(status.items(), key=lambda kv: kv[1].get('next_due', '')):
+            print(f"{series_id:<8} {entry.get('interval_hours', 0):>6}h {entry.get('checks', 0):>6}  "
+                  f"{entry.get('next_due', '')[:19]:<20} {names.get(series_id, '')}")
+        due = sum(1 for series_id in names if self.scheduler.is_due(series_id))
+        print(f"\n{len(status)} series scheduled, {due} due now")
+
+    def _print_run_stats(self):
+        """ملخص التشغيل - rate limiter / الكتابة / البروكسي / الكاش"""
+        for host, stats in BaseScraper.rate_limiter.summary().items():
+            get_logger('RateLimit').info("%s: %d requests, waited %ss", host, stats['requests'],
+                                         stats['waited_seconds'])
+        get_logger('Episodes').info("%d episode files read, %d reads avoided", self.io_stats['episode_reads'],
+                                    self.io_stats['episode_reads_avoided'])
+        for scope, stats in BaseScraper.parse_stats.summary().items():
+            peak = f", peak {stats['peak_bytes'] // 1024} KB" if stats['peak_bytes'] else ''
+            get_logger('Parse').info("%s: %d pages, %.1f ms/page%s", scope, stats['pages'],
+                                     stats['cpu_seconds'] / stats['pages'] * 1000, peak)
+        stats = self.storage.summary()
+        get_logger('Storage').info("%s: %d written, %d unchanged", type(self.storage).__name__,
+                                   stats['written'], stats['skipped'])
+        if self.storage is not self.json_storage:
+            stats = self.writer.summary()
+            get_logger('Writer').info("%d files exported, %d unchanged", stats['written'], stats['skipped'])
+        if self.publisher:
+            for name, stats in self.publisher.summary().items():
+                sizes, saved = format_savings(stats)
+                saved = f" ({saved:.0%} saved)" if saved is not None else ''
+                get_logger('Publish').info("%s: %d files, %s%s", name, stats['files'], sizes, saved)
+        if len(BaseScraper.proxy_pool):
+            stats = BaseScraper.proxy_pool.summary()
+            get_logger('ProxyPool').info("%d/%d healthy, %d penalized", stats['healthy'], stats['total'],
+                                         stats['penalized'])
+        if BaseScraper.http_cache:
+            stats = BaseScraper.http_cache.summary()
+            get_logger('HttpCache').info("%d not modified (304), %d downloaded, %d stored", stats['hits_304'],
+                                         stats['misses'], stats['stored'])
+
+    def _export_changed(self):
+        """SQLite: اكتب ملفات JSON للمسلسلات اللي اتغيرت بس في التشغيل ده"""
+        if self.storage is self.json_storage:
+            return
+        changed = set(self.storage.dirty_series)
+        self.storage.export_json(self.json_storage, changed)
+        self.storage.dirty_series.difference_update(changed)
+
+    def _report_metrics(self, run: Dict[str, Any]):
+        """p50/p95/p99 على الشاشة + run.json و scraper.prom في metrics_dir"""
+        if not self.metrics:
+            return
+        ms = lambda s: f"{s * 1000:.0f}ms"
+        for name, by, tag in (('scraper_request_seconds', ('host',), 'Requests'),
+                              ('scraper_parse_seconds', ('scope',), 'Parse'),
+                              ('scraper_extract_seconds', ('source', 'step'), 'Extract'),
+                              ('scraper_parse_pool_seconds', ('method',), 'ParsePool'),
+                              ('scraper_series_phase_seconds', ('phase',), 'Phase')):
+            for group, stats in sorted(self.metrics.summary(name, by).items()):
+                label = '/'.join(v for _, v in group) or 'all'
+                get_logger('Metrics').info("%s %s: n=%d p50=%s p95=%s p99=%s", tag, label, stats['count'],
+                                           ms(stats['p50']), ms(stats['p95']), ms(stats['p99']))
+        run = dict(run, finished_at=datetime.utcnow().isoformat() + 'Z',
+                   duration_seconds=round(time.monotonic() - self.started, 1), workers=self.workers)
+        self.metrics.write(self.metrics_dir, {'run': run})
+        get_logger('Metrics').info("Report written to %s", self.metrics_dir)
+
+    def export_json(self) -> int:
+        """Regenerate the whole JSON layout from the SQLite store"""
+        if self.storage is self.json_storage:
+            get_logger('Storage').info("JSON storage is already the export layout, nothing to do")
+            return 0
+        exported = self.storage.export_json(self.json_storage)
+        stats = self.writer.summary()
+        get_logger('Storage').info("Exported %d series: %d files written, %d unchanged", exported,
+                                   stats['written'], stats['skipped'])
+        return exported
+
+    def rebuild_bundles(self) -> int:
+        """Write data/bundles/<id>.json for every series (one-time move to episode_layout 'bundles')"""
+        if not self.json_storage.bundled:
+            get_logger('Storage').info("episode_layout is 'files', no bundles to build")
+            return 0
+        if self.storage is not self.json_storage:
+            self.storage.export_json(self.json_storage)
+        written = self.json_storage.rebuild_bundles()
+        self.changes.commit()
+        get_logger('Storage').info("%d bundles written", written)
+        return written
+
+    def publish_all(self) -> int:
+        """Rebuild the whole published copy of data/"""
+        if not self.publisher:
+            get_logger('Publish').info("Disabled in settings.publish")
+            return 0
+        published = self.publisher.publish_tree()
+        self._print_run_stats()
+        return published
+
+    def discover(self, max_pages: int = None) -> List[Dict]:
+        """Add series that appeared on Akwam since the last run to config.json
+
+        Every page with new series is written to the config right away, so
+        an interrupted discovery keeps what it found. New entries go to the
+        top of the list in listing order (newest first), like the rest of it.
+        """
+        self._validate_proxies()
+        settings = self.config.get('settings', {}).get('discovery', {})
+        fetch = self.config.get('sources', {}).get('akwam', {}).get(
+            'provides', ['info', 'poster', 'episodes', 'download', 'watch'])
+        series = self.config.setdefault('series', [])
+        known = {cfg['id'] for cfg in series}
+        added: List[Dict] = []
+        pages = 0
+        for page, found in self.scrapers['akwam'].discover_series(
+                known, max_pages=max_pages or settings.get('max_pages', 24),
+                workers=settings.get('workers', 4)):
+            pages += 1
+            if not found:
+                continue
+            entries = [{
+                'id': s['id'], 'name': s['name'], 'original_name': '', 'enabled': True,
+                'sources': {'akwam': {'url': s['url'], 'fetch': list(fetch)}}
+            } for s in found]
+            series[len(added):len(added)] = entries
+            added.extend(entries)
+            self._save_config()
+            for entry in entries:
+                get_logger('Discover').info("New series %s: %s", entry['id'], entry['name'])
+        get_logger('Discover').info("%d new series from %d listing pages", len(added), pages)
+        return added
+
+    def scrape_all(self, force_all: bool = False, resume: bool = False) -> List[Dict]:
+        self._validate_proxies()
         mode = "ALL" if force_all else "NEW only"
-        print(f"\n{'='*60}\nTurkish Series Scraper\nMode: {mode}\nTime: {datetime.now(timezone.utc).isoformat()}\n{'='*60}")
+        log.info("Turkish Series Scraper - mode: %s, workers: %d, time: %s", mode, self.workers,
+                 datetime.now(timezone.utc).isoformat())
 
-        all_series = []
+        enabled = []
         for cfg in self.config.get('series', []):
             if not cfg.get('enabled', True):
-                print(f"\n[SKIP] {cfg['name']} (disabled)")
+                log.info("Skip: %s (disabled)", cfg['name'])
                 continue
-            try:
-                data = self.scrape_series(cfg, force_all=force_all)
-                if data:
-                    last_date = data['episodes'][-1].get('date_added', '') if data['episodes'] else ''
-                    all_series.append({
-                        'id': data['id'], 'title': data['title'],
-                        'original_title': data.get('original_title', ''),
-                        'poster': data.get('poster', ''), 'year': data.get('year', ''),
-                        'country': data.get('country', ''), 'language': data.get('language', ''),
-                        'rating': data.get('rating', 0), 'genres': data.get('genres', []),
-                        'tags': data.get('tags', []), 'quality': data.get('quality', ''),
-                        'duration': data.get('duration', ''),
-                        'episodes_count': data.get('total_episodes', 0),
-                        'last_episode': data['episodes'][-1]['number'] if data['episodes'] else 0,
-                        'last_episode_date': last_date, 'last_updated': data['last_updated'],
-                        'status': data.get('status', 'ongoing')
-                    })
-            except Exception as e:
-                print(f"[ERROR] {cfg['name']}: {e}")
-                import traceback
-                traceback.print_exc()
-
-        self._save_json(self.data_dir / "series.json", {
-            'last_updated': datetime.utcnow().isoformat() + 'Z',
-            'total': len(all_series), 'series': all_series
-        })
-        print(f"\n{'='*60}\nComplete! {len(all_series)} series\n{'='*60}")
+            enabled.append(cfg)
+
+        # المسلسلات اللي خلصت في تشغيل اتقطع قبل كده (--resume)
+        resumed: Dict[str, Dict] = {}
+        interrupted = self.journal.interrupted_run() if resume else None
+        if interrupted and interrupted['start'].get('force_all') == force_all:
+            resumed = interrupted['series']
+            self.journal.resume(interrupted)
+            get_logger('Resume').info("Run %s: %d series already done, skipping them",
+                                      interrupted['start']['run_id'], len(resumed))
+        else:
+            if interrupted:
+                get_logger('Resume').info("Interrupted run used a different mode, starting over")
+            self.journal.start(force_all=force_all, scheduled=self.scheduled)
+
+        # مسلسلات خلصت قبل التحويل لـ bundles مش هتتكتب تاني - نعملها bundle مرة واحدة
+        built = self.json_storage.rebuild_bundles(missing_only=True)
+        if built:
+            get_logger('Storage').info("Built %d missing bundles", built)
+
+        # النتايج بتترتب حسب ترتيب config.json مهما كان ترتيب انتهاء الـ workers
+        results: List[Optional[Dict]] = [None] * len(enabled)
+        due = [i for i, cfg in enumerate(enabled) if cfg['id'] not in resumed]
+        # الـ feed بيحدد مين يتسحب؛ لو مش موثوق أو ميعاد الـ full sweep جه بنرجع للطريقة العادية
+        changed = self._feed_changed(enabled) if self.feed and not force_all else None
+        if self.scheduled and not force_all:
+            # --feed --scheduled: اللي ميعاده جه + اللي الـ feed شاف له حلقة جديدة قبل ميعاده
+            not_due = [i for i in due if not self.scheduler.is_due(enabled[i]['id'])
+                       and (changed is None or enabled[i]['id'] not in changed)]
+            self._load_not_due(enabled, not_due, results)
+            due = [i for i in due if i not in set(not_due)]
+        elif changed is not None:
+            unchanged = [i for i in due if enabled[i]['id'] not in changed]
+            self._load_not_due(enabled, unchanged, results, tag='Feed')
+            due = [i for i in due if i not in set(unchanged)]
+        deferred: List[int] = []
+        if self.max_seconds:
+            deferred = self._run_with_deadline(enabled, self._by_value(enabled, due), force_all, results)
+        elif self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self._scrape_safe, enabled[i], force_all): i for i in due}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        else:
+            for i in due:
+                results[i] = self._scrape_safe(enabled[i], force_all)
+
+        all_series = []
+        for cfg, data in zip(enabled, results):
+            if cfg['id'] in resumed:
+                all_series.append(resumed[cfg['id']])
+            elif data:
+                all_series.append(self._series_summary(data))
+
+        last_updated = datetime.utcnow().isoformat() + 'Z'
+        self.storage.save_catalog({'last_updated': last_updated, 'total': len(all_series), 'series': all_series})
+        # نفس الكتالوج على صفحات صغيرة عشان التطبيق يعرض أول شاشة بسرعة
+        self.catalog.write(all_series, last_updated)
+        self._export_changed()
+        if self.publisher and self.publisher.fresh:
+            # أول تشغيل للـ publish: ننشر الشجرة كلها مرة واحدة
+            self.publisher.publish_tree()
+        self.changes.commit()
+        self.fingerprints.save()
+        self.scheduler.save()
+        if self.feed and not self.scheduled and changed is None and not deferred:
+            self.change_feed.sweep_done()
+        self.journal.complete(len(all_series))
+        self._print_run_stats()
+        self._report_metrics({'command': 'all', 'force_all': force_all, 'series': len(all_series)})
+        log.info("Complete! %d series", len(all_series))
         return all_series
 
+    def close(self):
+        """Release the storage backend (the SQLite connection) once the command is done"""
+        self.storage.close()
+
     def scrape_single(self, series_id: str, force_all: bool = False) -> Optional[Dict]:
+        self._validate_proxies()
         for cfg in self.config.get('series', []):
             if cfg['id'] == series_id:
-                return self.scrape_series(cfg, force_all=force_all)
-        print(f"[ERROR] Series not found: {series_id}")
+                data = self.scrape_series(cfg, force_all=force_all)
+                self._export_changed()
+                if data:
+                    self.scheduler.record(series_id, data)
+                self.changes.commit()
+                self.fingerprints.save()
+                self.scheduler.save()
+                self._report_metrics({'command': 'series', 'series_id': series_id, 'force_all': force_all})
+                return data
+        log.error("Series not found: %s", series_id)
         return None
 
 
@@ -263,13 +715,71 @@ def main():
     parser.add_argument('--all', '-a', action='store_true', help='Scrape all series')
     parser.add_argument('--full', '-f', action='store_true', help='Full scrape (all episodes)')
     parser.add_argument('--config', '-c', help='Path to config file')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Number of series scraped concurrently (default: 1)')
+    parser.add_argument('--parse-workers', type=int,
+                        help='Processes that parse pages off the fetch threads; 0 = parse inline, '
+                             '-1 = one per CPU (default: settings.parse_workers)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Disable the conditional-GET HTTP cache')
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default='json',
+                        help='Where series/episode data is kept (default: json files)')
+    parser.add_argument('--db', help='SQLite database path (default: scraper/.cache/series.db)')
+    parser.add_argument('--export-json', action='store_true',
+                        help='Regenerate data/ JSON files from the SQLite store and exit')
+    parser.add_argument('--scheduled', action='store_true',
+                        help='Only scrape series whose adaptive schedule says they are due')
+    parser.add_argument('--feed', action='store_true',
+                        help="Only scrape series that show up on the sources' latest-episodes pages "
+                             "(full sweep every settings.feed.full_sweep_hours; with --scheduled, "
+                             "series the schedule says are due are scraped too and replace the sweep)")
+    parser.add_argument('--schedule-status', action='store_true',
+                        help='Print the per-series schedule and exit')
+    parser.add_argument('--max-seconds', type=float,
+                        help='Time budget for --all: scrape the most active series first and stop cleanly before it runs out')
+    parser.add_argument('--metrics-dir',
+                        help='Where run.json / scraper.prom are written (default: scraper/.cache/metrics)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted --all run, skipping series it already finished')
+    parser.add_argument('--publish', action='store_true',
+                        help='Rebuild the compressed publish copy of data/ and exit')
+    parser.add_argument('--rebuild-bundles', action='store_true',
+                        help='Write the episode bundle of every series (episode_layout "bundles") and exit')
+    parser.add_argument('--discover', action='store_true',
+                        help='Add new Akwam series to config.json (runs before --all / --series when combined)')
+    parser.add_argument('--discover-pages', type=int,
+                        help='Max listing pages for --discover (default: settings.discovery.max_pages, 24)')
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], type=str.upper,
+                        help='Log level (default: settings.logging.level, INFO)')
+    parser.add_argument('--log-format', choices=['text', 'json'],
+                        help='text = [Tag] lines, json = one JSON object per line')
     args = parser.parse_args()
 
-    scraper = SeriesScraper(config_path=args.config, new_only=not args.full)
-    if args.series:
-        scraper.scrape_single(args.series, force_all=args.full)
-    else:
-        scraper.scrape_all(force_all=args.full)
+    scraper = SeriesScraper(config_path=args.config, new_only=not args.full, workers=args.workers,
+                            use_cache=not args.no_cache, storage=args.storage, db_path=args.db,
+                            scheduled=args.scheduled, max_seconds=args.max_seconds,
+                            metrics_dir=args.metrics_dir, log_level=args.log_level,
+                            log_format=args.log_format, feed=args.feed,
+                            parse_workers=args.parse_workers)
+    try:
+        if args.discover:
+            scraper.discover(max_pages=args.discover_pages)
+            if not (args.all or args.series):
+                return
+        if args.schedule_status:
+            scraper.print_schedule()
+        elif args.export_json:
+            scraper.export_json()
+        elif args.publish:
+            scraper.publish_all()
+        elif args.rebuild_bundles:
+            scraper.rebuild_bundles()
+        elif args.series:
+            scraper.scrape_single(args.series, force_all=args.full)
+        else:
+            scraper.scrape_all(force_all=args.full, resume=args.resume)
+    finally:
+        scraper.close()
 
 
 if __name__ == "__main__":
@@ -1,24 +1,27 @@
 """Akwam Scraper - سكرابر موقع أكوام للمسلسلات التركية"""
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Any
 from bs4 import BeautifulSoup
 import re
-import time
-import json
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import unquote
-from .base import BaseScraper
+from .base import BaseScraper, RawPage
+from .extractor import MetadataExtractor, COMMON_FIELDS, RATING, AGE_RATING, json_ld_rating
 
 
 class AkwamScraper(BaseScraper):
     """Scraper for ak.sv (Akwam) - Turkish Series Only"""
 
+    metadata_extractor = MetadataExtractor(COMMON_FIELDS + [RATING, AGE_RATING])
+
     def __init__(self):
         super().__init__()
         self.base_url = "https://ak.sv"
         self.source_name = "Akwam"
         # section=32 = المسلسلات التركية
         self.turkish_section = 32
-        self.delay_between_requests = 2  # تأخير بين الطلبات (ثواني)
+        # المعدل الافتراضي لـ rate limiter لو ak.sv مش في settings.rate_limits
+        self.delay_between_requests = 2
 
     def get_series_list(self, pages: int = 24) -> List[Dict[str, Any]]:
         """
@@ -30,76 +33,153 @@ class AkwamScraper(BaseScraper):
         seen_ids = set()
 
         for page in range(1, pages + 1):
-            # رابط قسم المسلسلات التركية
-            url = f"{self.base_url}/series?section={self.turkish_section}&page={page}"
-            print(f"[Akwam] Fetching Turkish series page {page}/{pages}: {url}")
-
-            soup = self.get_page(url)
-            if not soup:
-                print(f"[Akwam] Failed to get page {page}")
-                time.sleep(self.delay_between_requests)
+            page_series = self.get_series_page(page, pages)
+            if page_series is None:
                 continue
 
-            # البحث عن روابط المسلسلات
-            series_links = soup.select('a[href*="/series/"]')
-
             page_count = 0
-            for link in series_links:
-                href = link.get('href', '')
-
-                # تجاهل روابط التصفح
-                if '/series?' in href or not href:
+            for series in page_series:
+                if series['id'] in seen_ids:
                     continue
+                seen_ids.add(series['id'])
+                all_series.append(series)
+                page_count += 1
 
-                # استخراج الـ ID
-                id_match = re.search(r'/series/(\d+)/', href)
-                if not id_match:
-                    continue
+            self.log.info("Page %d: Found %d series (Total: %d)", page, page_count, len(all_series))
 
-                series_id = id_match.group(1)
-                if series_id in seen_ids:
-                    continue
-                seen_ids.add(series_id)
-
-                # استخراج الاسم من الـ URL
-                name_match = re.search(r'/series/\d+/([^/]+)', href)
-                name = unquote(name_match.group(1)).replace('-', ' ') if name_match else ''
-
-                # استخراج الصورة من الكارد
-                parent = link.find_parent(['div', 'article', 'li'])
-                poster = ''
-                if parent:
-                    img = parent.select_one('img')
-                    if img:
-                        poster = img.get('src', '') or img.get('data-src', '')
-                        # تحسين جودة الصورة
-                        if poster and '/thumb/' in poster:
-                            poster = re.sub(r'/thumb/\d+x\d+/', '/thumb/260x380/', poster)
-
-                full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-
-                all_series.append({
-                    'id': series_id,
-                    'name': name,
-                    'url': full_url,
-                    'poster': poster
-                })
-                page_count += 1
+        self.log.info("Total Turkish series: %d", len(all_series))
+        return all_series
 
-            print(f"[Akwam] Page {page}: Found {page_count} series (Total: {len(all_series)})")
+    def get_series_page(self, page: int, pages: int = 0) -> Optional[List[Dict[str, Any]]]:
+        """مسلسلات صفحة واحدة من القسم بترتيبها في الصفحة - None لو الصفحة مجتش"""
+        # رابط قسم المسلسلات التركية
+        url = f"{self.base_url}/series?section={self.turkish_section}&page={page}"
+        self.log.info("Fetching Turkish series page %d%s: %s", page, f"/{pages}" if pages else '', url)
 
-            # تأخير بين الصفحات
-            time.sleep(self.delay_between_requests)
+        soup = self.get_page(url)
+        if not soup:
+            self.log.error("Failed to get page %d", page)
+            return None
+        return self._parse_series_page(soup)
 
-        print(f"[Akwam] Total Turkish series: {len(all_series)}")
-        return all_series
+    def _parse_series_page(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        """استخراج كروت المسلسلات من صفحة القسم"""
+        page_series = []
+        seen_ids = set()
+
+        # البحث عن روابط المسلسلات
+        series_links = soup.select('a[href*="/series/"]')
+
+        for link in series_links:
+            href = link.get('href', '')
+
+            # تجاهل روابط التصفح
+            if '/series?' in href or not href:
+                continue
+
+            # استخراج الـ ID
+            id_match = re.search(r'/series/(\d+)/', href)
+            if not id_match:
+                continue
+
+            series_id = id_match.group(1)
+            if series_id in seen_ids:
+                continue
+            seen_ids.add(series_id)
+
+            # استخراج الاسم من الـ URL
+            name_match = re.search(r'/series/\d+/([^/]+)', href)
+            name = unquote(name_match.group(1)).replace('-', ' ') if name_match else ''
+
+            # استخراج الصورة من الكارد
+            parent = link.find_parent(['div', 'article', 'li'])
+            poster = ''
+            if parent:
+                img = parent.select_one('img')
+                if img:
+                    poster = img.get('src', '') or img.get('data-src', '')
+                    # تحسين جودة الصورة
+                    if poster and '/thumb/' in poster:
+                        poster = re.sub(r'/thumb/\d+x\d+/', '/thumb/260x380/', poster)
+
+            full_url = href if href.startswith('http') else f"{self.base_url}{href}"
+
+            page_series.append({
+                'id': series_id,
+                'name': name,
+                'url': full_url,
+                'poster': poster
+            })
+
+        return page_series
+
+    def get_latest_episodes(self, url_template: str, pages: int = 2) -> Optional[List[Dict[str, Any]]]:
+        """
+        صفحات "أحدث الحلقات" - كل حلقة بـ slug المسلسل ورقمها
+        url_template has a {page} placeholder. Episode URLs carry the series
+        slug: /episode/<id>/<series-slug>/<episode-slug>. None if any page
+        could not be fetched.
+        """
+        entries = []
+        for page in range(1, pages + 1):
+            soup = self.get_page(url_template.format(page=page))
+            if not soup:
+                self.log.error("Failed to get latest episodes page %d", page)
+                return None
+            page_entries = []
+            seen = set()
+            for link in soup.select('a[href*="/episode/"]'):
+                href = unquote(link.get('href', ''))
+                match = re.search(r'/episode/\d+/([^/]+)/([^/?#]*)', href)
+                if not match or href in seen:
+                    continue
+                seen.add(href)
+                number = re.search(r'(\d+)$', match.group(2))
+                page_entries.append({'url': href, 'series_slug': match.group(1), 'page': page,
+                                     'number': int(number.group(1)) if number else None})
+            self.log.info("Latest episodes page %d: %d entries", page, len(page_entries))
+            entries.extend(page_entries)
+        return entries
+
+    def discover_series(self, known_ids: Set[str], max_pages: int = 24,
+                        workers: int = 4) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        اكتشاف المسلسلات الجديدة - القسم مترتب من الأحدث، فبنقف عند أول صفحة كلها معروفة
+        Yields (page, series not in known_ids) for each page in order and stops
+        after the first page whose series are all known, an empty page (end of
+        the section) or max_pages. Pages are fetched in waves of 1, 2, 4 ... up
+        to `workers` at a time, so a routine run with nothing new costs one
+        request; the rate limiter and per-host cap still apply to every fetch.
+        """
+        known = set(known_ids)
+        page, wave = 1, 1
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            while page <= max_pages:
+                numbers = list(range(page, min(page + wave, max_pages + 1)))
+                fetched = list(pool.map(self.get_series_page, numbers))
+                for number, page_series in zip(numbers, fetched):
+                    if page_series is None:
+                        continue
+                    new = [s for s in page_series if s['id'] not in known]
+                    known.update(s['id'] for s in new)
+                    self.log.info("Page %d: %d series, %d new", number, len(page_series), len(new))
+                    yield number, new
+                    if not page_series or not new:
+                        return
+                page += len(numbers)
+                wave = min(wave * 2, max(1, workers))
 
     def get_series_info(self, url: str) -> Optional[Dict[str, Any]]:
         """جلب معلومات المسلسل التفصيلية"""
-        soup = self.get_page(url)
-
-        if not soup:
+        page = self.get_raw(url)
+        if not page:
             return None
+        return self._parse('_parse_series_info', page)
+
+    def _parse_series_info(self, page: RawPage) -> Dict[str, Any]:
+        """صفحة المسلسل -> info (بيشتغل في الـ parse pool لو موجود)"""
+        soup = page.soup()
+        url = page.url
 
         # Extract series ID from URL
         match = re.search(r'/series/(\d+)/', url)
@@ -140,7 +220,8 @@ class AkwamScraper(BaseScraper):
 
         # === METADATA من widget-body ===
         # البحث عن جدول المعلومات
-        self._extract_metadata(soup, info)
+        with self._measure('scraper_extract_seconds', step='metadata'):
+            self._extract_metadata(soup, info)
 
         # === POSTER IMAGE ===
         self._extract_poster(soup, info)
@@ -162,152 +243,22 @@ class AkwamScraper(BaseScraper):
                     break
 
         # === GENRES/TAGS ===
-        self._extract_tags(soup, info)
+        with self._measure('scraper_extract_seconds', step='tags'):
+            self._extract_tags(soup, info)
 
         # === EPISODES ===
-        info['episodes'] = self._extract_episodes(soup)
+        with self._measure('scraper_extract_seconds', step='episodes'):
+            info['episodes'] = self._extract_episodes(soup)
         info['total_episodes'] = len(info['episodes'])
 
         return info
 
     def _extract_metadata(self, soup: BeautifulSoup, info: Dict):
         """استخراج الميتاداتا من صفحة المسلسل"""
-
-        # البحث في كل النصوص
-        page_text = soup.get_text()
-
-        # === السنة ===
-        # البحث عن "السنة : 2024" أو "year: 2024"
-        year_patterns = [
-            r'السنة\s*[:\s]+\s*(\d{4})',
-            r'سنة الانتاج\s*[:\s]+\s*(\d{4})',
-            r'الإنتاج\s*[:\s]+\s*(\d{4})',
-            r'year\s*[:\s]+\s*(\d{4})',
-        ]
-        for pattern in year_patterns:
-            match = re.search(pattern, page_text)
-            if match:
-                info['year'] = match.group(1)
-                break
-
-        # === البلد/الانتاج ===
-        country_patterns = [
-            r'انتاج\s*[:\s]+\s*([^\n\r]+)',
-            r'الانتاج\s*[:\s]+\s*([^\n\r]+)',
-            r'بلد الانتاج\s*[:\s]+\s*([^\n\r]+)',
-            r'country\s*[:\s]+\s*([^\n\r]+)',
-        ]
-        for pattern in country_patterns:
-            match = re.search(pattern, page_text, re.IGNORECASE)
-            if match:
-                country = match.group(1).strip()
-                # تنظيف النص
-                country = re.sub(r'\s+', ' ', country)
-                if len(country) < 50:  # تجنب النصوص الطويلة
-                    info['country'] = country.split()[0] if country else ''
-                break
-
-        # === اللغة ===
-        lang_patterns = [
-            r'اللغة\s*[:\s]+\s*([^\n\r]+)',
-            r'language\s*[:\s]+\s*([^\n\r]+)',
-        ]
-        for pattern in lang_patterns:
-            match = re.search(pattern, page_text, re.IGNORECASE)
-            if match:
-                lang = match.group(1).strip()
-                if len(lang) < 30:
-                    info['language'] = lang.split()[0] if lang else ''
-                break
-
-        # === الجودة ===
-        quality_patterns = [
-            r'الجودة\s*[:\s]+\s*([^\n\r]+)',
-            r'quality\s*[:\s]+\s*([^\n\r]+)',
-        ]
-        for pattern in quality_patterns:
-            match = re.search(pattern, page_text, re.IGNORECASE)
-            if match:
-                quality = match.group(1).strip()
-                # استخراج الجودة فقط (مثل 720p, 1080p, WEB-DL)
-                quality_match = re.search(r'(\d+p|WEB-?DL|BluRay|HDRip|DVDRip)', quality, re.IGNORECASE)
-                if quality_match:
-                    info['quality'] = quality_match.group(1)
-                break
-
-        # === المدة ===
-        duration_patterns = [
-            r'مدة المسلسل\s*[:\s]+\s*([^\n\r]+)',
-            r'المدة\s*[:\s]+\s*([^\n\r]+)',
-            r'duration\s*[:\s]+\s*([^\n\r]+)',
-        ]
-        for pattern in duration_patterns:
-            match = re.search(pattern, page_text, re.IGNORECASE)
-            if match:
-                duration = match.group(1).strip()
-                # استخراج الدقائق
-                dur_match = re.search(r'(\d+)\s*دقيقة', duration)
-                if dur_match:
-                    info['duration'] = f"{dur_match.group(1)} دقيقة"
-                else:
-                    dur_match = re.search(r'(\d+)\s*min', duration, re.IGNORECASE)
-                    if dur_match:
-                        info['duration'] = f"{dur_match.group(1)} min"
-                break
-
-        # === التقييم من JSON-LD Schema ===
-        # البحث عن AggregateRating في JSON-LD
-        script_tags = soup.select('script[type="application/ld+json"]')
-        for script in script_tags:
-            try:
-                json_text = script.get_text(strip=True)
-                # قد يكون array أو object
-                if json_text.startswith('['):
-                    json_data = json.loads(json_text)
-                    for item in json_data:
-                        if isinstance(item, dict) and 'AggregateRating' in item:
-                            rating_val = item['AggregateRating'].get('ratingValue')
-                            if rating_val:
-                                info['rating'] = float(rating_val)
-                                break
-                else:
-                    json_data = json.loads(json_text)
-                    if isinstance(json_data, dict) and 'AggregateRating' in json_data:
-                        rating_val = json_data['AggregateRating'].get('ratingValue')
-                        if rating_val:
-                            info['rating'] = float(rating_val)
-            except:
-                pass
-
-        # Fallback: البحث في النص
-        if info['rating'] == 0.0:
-            rating_patterns = [
-                r'"ratingValue"\s*:\s*"?(\d+\.?\d*)"?',
-                r'(\d+\.?\d*)\s*/\s*10',
-                r'التقييم\s*[:\s]+\s*(\d+\.?\d*)',
-            ]
-            for pattern in rating_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    try:
-                        rating = float(match.group(1))
-                        if 0 < rating <= 10:
-                            info['rating'] = rating
-                            break
-                    except:
-                        pass
-
-        # === تصنيف العمر ===
-        age_patterns = [
-            r'(PG-?\d+|R|G|NC-17)',
-            r'للكبار فقط',
-            r'عائلي',
-        ]
-        for pattern in age_patterns:
-            match = re.search(pattern, page_text, re.IGNORECASE)
-            if match:
-                info['age_rating'] = match.group(0)
-                break
+        # التقييم من JSON-LD الأول، والأنماط النصية بتكمل اللي ناقص
+        info['rating'] = json_ld_rating(soup) or info['rating']
+        # نص الصفحة بيتحسب مرة واحدة وكل الأنماط متجمعة مسبقاً
+        self.metadata_extractor.extract(soup.get_text(), info, only_missing=('rating',))
 
     def _extract_poster(self, soup: BeautifulSoup, info: Dict):
         """استخراج صورة البوستر"""
@@ -358,8 +309,9 @@ class AkwamScraper(BaseScraper):
             '.genres a'
         ]
 
-        tags = set()
-        genres = set()
+        # dict بدل set عشان الترتيب يفضل ثابت (ترتيب ظهورها في الصفحة)
+        tags = {}
+        genres = {}
 
         for selector in tag_selectors:
             links = soup.select(selector)
@@ -372,9 +324,9 @@ class AkwamScraper(BaseScraper):
 
                 # تصنيف التاجز
                 if any(g in text for g in ['دراما', 'أكشن', 'كوميدي', 'رومانسي', 'غموض', 'إثارة', 'جريمة', 'عائلي', 'حرب', 'تاريخي', 'رعب', 'خيال']):
-                    genres.add(text)
+                    genres[text] = None
                 else:
-                    tags.add(text)
+                    tags[text] = None
 
         # البحث عن badges في الصفحة
         badges = soup.select('.badge, .label, .tag-item')
@@ -382,9 +334,9 @@ class AkwamScraper(BaseScraper):
             text = badge.get_text(strip=True)
             if text and len(text) < 20:
                 if any(g in text for g in ['مدبلج', 'مترجم', 'تركي', 'Netflix', 'رمضان']):
-                    tags.add(text)
+                    tags[text] = None
                 elif any(g in text for g in ['دراما', 'أكشن', 'كوميدي', 'رومانسي']):
-                    genres.add(text)
+                    genres[text] = None
 
         info['genres'] = list(genres)[:10]
         info['tags'] = list(tags)[:10]
@@ -451,7 +403,11 @@ class AkwamScraper(BaseScraper):
 
     def get_episodes_list(self, url: str) -> List[Dict[str, Any]]:
         """جلب قائمة الحلقات من صفحة المسلسل"""
-        soup = self.get_page(url)
-        if not soup:
+        page = self.get_raw(url)
+        if not page:
             return []
-        return self._extract_episodes(soup)
+        return self._parse('_parse_episodes', page)
+
+    def _parse_episodes(self, page: RawPage) -> List[Dict[str, Any]]:
+        """قائمة الحلقات من صفحة المسلسل"""
+        return self._extract_episodes(page.soup())
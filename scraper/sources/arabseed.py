@@ -1,16 +1,29 @@
 """ArabSeed Scraper - سكرابر موقع عرب سيد للمسلسلات التركية"""
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from bs4 import BeautifulSoup
 import re
 import time
 import base64
-from .base import BaseScraper
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+from .base import BaseScraper, RawPage
+from .extractor import MetadataExtractor, COMMON_FIELDS
+
+
+# Pattern: /play.php?url=BASE64 or /play/?id=BASE64
+PLAY_URL_PATTERN = re.compile(r'/play[^"\']*\?(?:id|url)=([A-Za-z0-9+/_=-]+)')
 
 
 class ArabSeedScraper(BaseScraper):
     """Scraper for ArabSeed - Turkish Series"""
 
+    metadata_extractor = MetadataExtractor(COMMON_FIELDS)
+
+    _shared_page_pool: Optional[ThreadPoolExecutor] = None
+    _page_pool_lock = threading.Lock()
+
     def __init__(self):
         super().__init__()
         self.base_url = "https://a.asd.homes"
@@ -64,10 +77,13 @@ class ArabSeedScraper(BaseScraper):
         Get series information from an episode page
         (ArabSeed shows series info on every episode page)
         """
-        soup = self.get_page(url)
-        if not soup:
+        page = self.get_raw(url)
+        if not page:
             return None
+        return self._parse('_parse_series_info', page)
 
+    def _parse_series_info(self, page: RawPage) -> Dict[str, Any]:
+        soup = page.soup()
         info = {
             'title': '',
             'original_title': '',
@@ -91,6 +107,10 @@ class ArabSeedScraper(BaseScraper):
         if title_elem:
             info['title'] = title_elem.get_text(strip=True)
 
+        # Metadata - نفس مواصفات أكوام، والبلد بيفضل تركيا لو موجود
+        with self._measure('scraper_extract_seconds', step='metadata'):
+            self.metadata_extractor.extract(soup.get_text(), info, only_missing=('country',))
+
         # Episodes list
         episodes = self._extract_episodes(soup)
         info['episodes'] = episodes
@@ -100,11 +120,15 @@ class ArabSeedScraper(BaseScraper):
 
     def get_episodes_list(self, url: str) -> List[Dict[str, Any]]:
         """Get list of all episodes from an episode page"""
-        soup = self.get_page(url)
-        if not soup:
+        page = self.get_raw(url)
+        if not page:
             return []
+        return self._parse('_parse_episodes_list', page)
 
-        return self._extract_episodes(soup)
+    def _parse_episodes_list(self, page: RawPage) -> List[Dict[str, Any]]:
+        soup = page.soup(['ul.episodes__list'])
+        with self._measure('scraper_extract_seconds', step='episodes'):
+            return self._extract_episodes(soup)
 
     def _extract_episodes(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """Extract episodes list from page"""
@@ -133,9 +157,35 @@ class ArabSeedScraper(BaseScraper):
         episodes.sort(key=lambda x: x['number'])
         return episodes
 
+    def get_latest_episodes(self, url_template: str, pages: int = 2) -> Optional[List[Dict[str, Any]]]:
+        """
+        Episodes from the "recently added" listing ({page} in url_template)
+        Each entry keeps the episode slug; utils.feed maps it back to the
+        configured series. None if any page could not be fetched.
+        """
+        entries = []
+        for page in range(1, pages + 1):
+            soup = self.get_page(url_template.format(page=page))
+            if not soup:
+                self.log.error("Failed to get latest episodes page %d", page)
+                return None
+            page_entries = []
+            seen = set()
+            for link in soup.select('a[href]'):
+                href = unquote(link.get('href', ''))
+                slug = urlparse(href).path.strip('/').split('/')[-1]
+                number = re.search(r'الحلقة-(\d+)', slug)
+                if not number or slug in seen:
+                    continue
+                seen.add(slug)
+                page_entries.append({'url': href, 'slug': slug, 'number': int(number.group(1)), 'page': page})
+            self.log.info("Latest episodes page %d: %d entries", page, len(page_entries))
+            entries.extend(page_entries)
+        return entries
+
     def get_seasons_list(self, url: str) -> List[Dict[str, Any]]:
         """Get list of seasons from episode page"""
-        soup = self.get_page(url)
+        soup = self.get_page(url, parse_only=['#seasons__list'])
         if not soup:
             return []
 
@@ -160,23 +210,57 @@ class ArabSeedScraper(BaseScraper):
         """
         Get watch iframes and download links for an episode
         Returns first 2 servers per quality for both watch and download
+        The /watch/ and /download/ pages are fetched at the same time
         """
-        result = {
-            'watch': [],
-            'download': []
-        }
+        watch, download = self._episode_server_futures(url)
+        return {'watch': watch.result(), 'download': download.result()}
 
-        # Get watch servers
+    def get_servers_for_episodes(self, urls: List[str], workers: int = 4) -> List[Dict[str, Any]]:
+        """
+        get_episode_servers for many episodes at once
+        Results come back in the same order as urls; the per-host cap and
+        rate limiter in BaseScraper still bound the real request rate.
+        The threads here only fetch: each page goes to the parse stage and
+        the thread moves on to the next episode, and the parsed servers are
+        collected once every page is in.
+        """
+        if workers <= 1 or len(urls) <= 1:
+            pending = [self._episode_server_futures(url) for url in urls]
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(urls))) as pool:
+                pending = list(pool.map(self._episode_server_futures, urls))
+        return [{'watch': watch.result(), 'download': download.result()} for watch, download in pending]
+
+    def _episode_server_futures(self, url: str) -> Tuple[Future, Future]:
+        """Fetch an episode's /watch/ and /download/ pages; returns the Futures of their parses"""
         watch_url = url.rstrip('/') + '/watch/' if not url.endswith('/watch/') else url
-        watch_servers = self._get_watch_servers(watch_url)
-        result['watch'] = watch_servers
-
-        # Get download servers
         download_url = url.rstrip('/').replace('/watch/', '') + '/download/'
-        download_servers = self._get_download_servers(download_url)
-        result['download'] = download_servers
 
-        return result
+        # صفحة التحميل في thread تاني بينما صفحة المشاهدة في الـ thread الحالي
+        download = self._page_pool().submit(self._fetch_servers, download_url, '_parse_download_servers')
+        try:
+            watch = self._fetch_servers(watch_url, '_parse_watch_servers')
+        finally:
+            # بنستنى الـ request بس، مش الـ parse
+            download = download.result()
+        return watch, download
+
+    def _fetch_servers(self, url: str, method: str) -> Future:
+        """Fetch one server page and hand it to the parse stage (a failed fetch parses to [])"""
+        page = self.get_raw(url)
+        if not page:
+            empty: Future = Future()
+            empty.set_result([])
+            return empty
+        return self._parse_async(method, page)
+
+    @classmethod
+    def _page_pool(cls) -> ThreadPoolExecutor:
+        """Shared pool for the second page of each episode (its tasks never wait on other tasks)"""
+        with cls._page_pool_lock:
+            if cls._shared_page_pool is None:
+                cls._shared_page_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='arabseed-page')
+            return cls._shared_page_pool
 
     def _get_watch_servers(self, watch_url: str) -> List[Dict[str, Any]]:
         """
@@ -184,18 +268,20 @@ class ArabSeedScraper(BaseScraper):
         Excludes reviewrate.net and asd.homes URLs
         Extracts all server URLs from /play.php?url= or /play/?id= patterns
         """
-        print(f"[ArabSeed] Getting watch servers from: {watch_url}")
+        self.log.debug("Getting watch servers from: %s", watch_url)
 
-        soup = self.get_page(watch_url)
-        if not soup:
-            return []
+        servers = self._fetch_servers(watch_url, '_parse_watch_servers').result()
+        self.log.debug("Found %d valid watch servers (excluded reviewrate.net/asd.homes)", len(servers))
+        return servers
 
+    def _parse_watch_servers(self, page: RawPage) -> List[Dict[str, Any]]:
+        # الصفحة بتتقري كنص - الـ regex مش محتاج شجرة، والجودات بس بتتعمل لها parse جزئي
         servers = []
         seen_urls = set()  # لتجنب التكرار
 
         # Get qualities available
         qualities = []
-        quality_items = soup.select('li[data-quality]')
+        quality_items = page.select('li[data-quality]')
         for item in quality_items:
             q = item.get('data-quality')
             if q:
@@ -205,12 +291,9 @@ class ArabSeedScraper(BaseScraper):
             qualities = ['720']  # Default
 
         # البحث عن كل روابط السيرفرات في HTML
-        # Pattern: /play.php?url=BASE64 or /play/?id=BASE64
-        html = str(soup)
-        play_pattern = r'/play[^"\']*\?(?:id|url)=([A-Za-z0-9+/_=-]+)'
-        matches = re.findall(play_pattern, html)
+        matches = PLAY_URL_PATTERN.findall(page.text)
 
-        print(f"[ArabSeed] Found {len(matches)} play URLs in HTML")
+        self.log.debug("Found %d play URLs in HTML", len(matches))
 
         for encoded in matches:
             decoded_url = self._decode_base64_url(encoded)
@@ -225,7 +308,7 @@ class ArabSeedScraper(BaseScraper):
 
             # Skip excluded URLs (reviewrate.net, asd.homes)
             if self._is_excluded_url(decoded_url):
-                print(f"[ArabSeed] Skipping excluded watch URL: {decoded_url}")
+                self.log.debug("Skipping excluded watch URL: %s", decoded_url)
                 continue
 
             # استخراج اسم السيرفر من الدومين
@@ -240,15 +323,11 @@ class ArabSeedScraper(BaseScraper):
             })
 
         # نأخذ أول سيرفرين فقط
-        servers = servers[:2]
-
-        print(f"[ArabSeed] Found {len(servers)} valid watch servers (excluded reviewrate.net/asd.homes)")
-        return servers
+        return servers[:2]
 
     def _extract_server_name(self, url: str) -> str:
         """Extract server name from URL domain"""
         try:
-            from urllib.parse import urlparse
             domain = urlparse(url).netloc
             # Remove common prefixes
             domain = domain.replace('www.', '').replace('m.', '')
@@ -265,12 +344,12 @@ class ArabSeedScraper(BaseScraper):
         Get download links for each quality (first 2 per quality)
         Excludes reviewrate.net and asd.homes URLs
         """
-        print(f"[ArabSeed] Getting download servers from: {download_url}")
+        self.log.debug("Getting download servers from: %s", download_url)
 
-        soup = self.get_page(download_url)
-        if not soup:
-            return []
+        return self._fetch_servers(download_url, '_parse_download_servers').result()
 
+    def _parse_download_servers(self, page: RawPage) -> List[Dict[str, Any]]:
+        soup = page.soup(['div[data-quality]'])
         servers = []
         excluded_count = 0
 
@@ -300,7 +379,7 @@ class ArabSeedScraper(BaseScraper):
                 if decoded:
                     # Skip excluded URLs (reviewrate.net, asd.homes)
                     if self._is_excluded_url(decoded):
-                        print(f"[ArabSeed] Skipping excluded download URL: {decoded}")
+                        self.log.debug("Skipping excluded download URL: %s", decoded)
                         excluded_count += 1
                         continue
 
@@ -318,7 +397,8 @@ class ArabSeedScraper(BaseScraper):
                     })
                     valid_count += 1
 
-        print(f"[ArabSeed] Found {len(servers)} valid download servers (excluded {excluded_count} reviewrate.net/asd.homes)")
+        self.log.debug("Found %d valid download servers (excluded %d reviewrate.net/asd.homes)",
+                       len(servers), excluded_count)
         return servers
 
     def _clean_server_name(self, name: str) -> str:
@@ -338,7 +418,7 @@ class ArabSeedScraper(BaseScraper):
         """
         Full scrape of an episode - returns all data
         """
-        print(f"\n[ArabSeed] Scraping episode: {episode_url}")
+        self.log.info("Scraping episode: %s", episode_url)
 
         servers = self.get_episode_servers(episode_url)
 
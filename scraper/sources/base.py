@@ -1,33 +1,171 @@
 """Base Scraper Class - كل السكرابرز هترث منه"""
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import cloudscraper
 import time
 import re
 import os
 import random
+import threading
+import logging
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from pathlib import Path
+from urllib.parse import urlparse
+from .http_cache import HttpCache
+from .proxy_pool import ProxyPool
+from .parse_pool import ParsePool
+from .parsing import ParseScope, ParseStats, parse_html, scope_label
+
+
+class TokenBucket:
+    """Token bucket لمضيف واحد - rate = توكنز في الثانية، burst = أقصى رصيد"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = max(rate, 0.001)
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait for it.
+
+        The balance may go negative so every caller reserves its own slot;
+        the lock is never held while sleeping, so waiting threads don't
+        block each other's reservations.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """Shared per-host rate limiter configured from config.json `settings.rate_limits`
+
+    {"default": {"rate": 1.0, "burst": 2}, "ak.sv": {"rate": 0.5, "burst": 3}}
+    """
+
+    def __init__(self):
+        self._limits: Dict[str, Dict[str, float]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._waited: Dict[str, float] = {}
+        self._requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, limits: Dict[str, Dict[str, float]]):
+        with self._lock:
+            self._limits = dict(limits or {})
+            self._buckets = {}
+
+    def _bucket(self, host: str, default_rate: float) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                limit = self._limits.get(host) or self._limits.get('default') or {}
+                bucket = TokenBucket(float(limit.get('rate', default_rate)),
+                                     int(limit.get('burst', 1)))
+                self._buckets[host] = bucket
+            return bucket
+
+    def _record(self, host: str, waited: float):
+        with self._lock:
+            self._waited[host] = self._waited.get(host, 0.0) + waited
+            self._requests[host] = self._requests.get(host, 0) + 1
+
+    def wait(self, url: str, default_rate: float = 1.0) -> float:
+        """Block until a request to url's host is allowed; returns seconds waited"""
+        host = urlparse(url).netloc
+        waited = self._bucket(host, default_rate).acquire()
+        self._record(host, waited)
+        return waited
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {host: {'requests': self._requests[host],
+                           'waited_seconds': round(self._waited.get(host, 0.0), 2)}
+                    for host in self._requests}
+
+
+class RawPage:
+    """Decoded response body; BeautifulSoup trees are built lazily and cached per selector scope"""
+
+    def __init__(self, url: str, text: str):
+        self.url = url
+        self.text = text
+        self._soups: Dict[str, BeautifulSoup] = {}
+
+    def soup(self, parse_only: ParseScope = None) -> BeautifulSoup:
+        # كل SoupStrainer ليه نفس الـ label، فبيتعمله parse كل مرة من غير كاش
+        cacheable = not isinstance(parse_only, SoupStrainer)
+        key = scope_label(parse_only)
+        if cacheable and key in self._soups:
+            return self._soups[key]
+        start = time.perf_counter()
+        soup = parse_html(self.text, parse_only, BaseScraper.parse_stats)
+        if BaseScraper.metrics is not None:
+            BaseScraper.metrics.observe('scraper_parse_seconds', time.perf_counter() - start, scope=key)
+        if cacheable:
+            self._soups[key] = soup
+        return soup
+
+    def select(self, selector: str) -> List[Any]:
+        """CSS select that parses only the subtrees the selector can match"""
+        return self.soup([selector]).select(selector)
 
 
 class BaseScraper(ABC):
     """Base class for all scrapers"""
 
-    # Shared proxy list across all scraper instances
-    _proxy_list: List[str] = []
-    _working_proxy: Optional[str] = None
+    # Shared proxy pool across all scraper instances and workers
+    proxy_pool = ProxyPool()
+    max_proxy_attempts: int = 3
+    proxy_timeout: float = 10
     _proxy_loaded: bool = False
+    _proxy_lock = threading.Lock()
+
+    # حد أقصى للطلبات المتزامنة لكل host (مشترك بين كل الـ workers)
+    max_connections_per_host: int = 4
+    _host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    _host_slots_lock = threading.Lock()
+
+    # Token bucket مشترك لكل الـ scrapers اللي بتكلم نفس الـ host
+    rate_limiter = RateLimiter()
+
+    # وقت وذاكرة الـ parse لكل نطاق
+    parse_stats = ParseStats()
+
+    # processes للـ parse (settings.parse_workers) - None = الـ parse في نفس thread الشبكة
+    parse_pool: Optional[ParsePool] = None
+
+    # كاش HTTP على الديسك (None = مقفول)
+    http_cache: Optional[HttpCache] = None
+    default_cache_dir = Path(__file__).parent.parent / '.cache' / 'http'
+
+    # قياسات التشغيل (utils.metrics.Metrics) - SeriesScraper بيحقنها، و None = مقفولة
+    metrics = None
+
+    # logger لكل مصدر - بيتعمل مرة واحدة عشان الـ debug في اللوب يفضل رخيص
+    _loggers: Dict[str, logging.Logger] = {}
 
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper(
-            browser={
-                'browser': 'chrome',
-                'platform': 'windows',
-                'mobile': False
-            }
-        )
+        # cloudscraper session لكل thread - الـ sessions مش thread-safe
+        self._local = threading.local()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -35,10 +173,91 @@ class BaseScraper(ABC):
         }
         self.base_url = ""
         self.source_name = ""
+        # المعدل الافتراضي لو الـ host مش متعرف في settings.rate_limits
+        self.delay_between_requests = 1.0
 
         # Load proxies once
-        if not BaseScraper._proxy_loaded:
-            self._load_proxies()
+        with BaseScraper._proxy_lock:
+            if not BaseScraper._proxy_loaded:
+                self._load_proxies()
+
+    @classmethod
+    def configure(cls, settings: Dict[str, Any], use_cache: bool = True):
+        """Apply shared settings from config.json `settings`"""
+        max_conn = settings.get('max_connections_per_host')
+        if max_conn:
+            with cls._host_slots_lock:
+                BaseScraper.max_connections_per_host = int(max_conn)
+                BaseScraper._host_slots = {}
+        BaseScraper.rate_limiter.configure(settings.get('rate_limits', {}))
+        if settings.get('profile_parse_memory'):
+            BaseScraper.parse_stats.enable_memory_tracking()
+        if BaseScraper.parse_pool:
+            BaseScraper.parse_pool.shutdown()
+        parse_workers = int(settings.get('parse_workers') or 0)
+        BaseScraper.parse_pool = ParsePool(parse_workers, track_memory=bool(
+            settings.get('profile_parse_memory'))) if parse_workers else None
+
+        proxy_settings = settings.get('proxy_pool', {})
+        BaseScraper.max_proxy_attempts = proxy_settings.get('max_attempts', BaseScraper.max_proxy_attempts)
+        BaseScraper.proxy_timeout = proxy_settings.get('timeout_seconds', BaseScraper.proxy_timeout)
+        BaseScraper.proxy_pool.base_penalty = proxy_settings.get('base_penalty_seconds', 30)
+        BaseScraper.proxy_pool.max_penalty = proxy_settings.get('max_penalty_seconds', 1800)
+
+        cache_settings = settings.get('http_cache', {})
+        if use_cache and cache_settings.get('enabled', True):
+            cache = HttpCache(
+                Path(cache_settings.get('dir') or cls.default_cache_dir),
+                ttl_seconds=cache_settings.get('ttl_hours', 168) * 3600,
+                max_bytes=cache_settings.get('max_mb', 300) * 1024 * 1024
+            )
+            removed = cache.evict()
+            if removed:
+                logging.getLogger('scraper.HttpCache').info("Evicted %d entries", removed)
+            BaseScraper.http_cache = cache
+        else:
+            BaseScraper.http_cache = None
+
+    @property
+    def log(self) -> logging.Logger:
+        """Logger tagged with this scraper's source name (utils.log configures the `scraper` tree)"""
+        name = self.source_name or 'BaseScraper'
+        logger = BaseScraper._loggers.get(name)
+        if logger is None:
+            logger = BaseScraper._loggers[name] = logging.getLogger(f"scraper.{name}")
+        return logger
+
+    @property
+    def scraper(self):
+        """Per-thread cloudscraper session"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = cloudscraper.create_scraper(
+                browser={
+                    'browser': 'chrome',
+                    'platform': 'windows',
+                    'mobile': False
+                }
+            )
+            self._local.session = session
+        return session
+
+    @contextmanager
+    def _host_slot(self, url: str):
+        """Limit concurrent requests to the same host"""
+        host = urlparse(url).netloc
+        with BaseScraper._host_slots_lock:
+            slot = BaseScraper._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(BaseScraper.max_connections_per_host)
+                BaseScraper._host_slots[host] = slot
+        with slot:
+            yield
+
+    def _throttle(self, url: str) -> float:
+        """Wait for the host's token bucket before sending a request"""
+        default_rate = 1.0 / self.delay_between_requests if self.delay_between_requests else 1000.0
+        return BaseScraper.rate_limiter.wait(url, default_rate)
 
     def _load_proxies(self):
         """Load proxy list from file or environment"""
@@ -47,8 +266,8 @@ class BaseScraper(ABC):
         # First check environment variable for single proxy
         proxy_url = os.environ.get('SCRAPER_PROXY')
         if proxy_url:
-            BaseScraper._proxy_list = [proxy_url]
-            print(f"[BaseScraper] Using proxy from env: {proxy_url[:30]}...")
+            BaseScraper.proxy_pool.load([proxy_url])
+            self.log.info("Using proxy from env: %s...", proxy_url[:30])
             return
 
         # Then check for proxy list file
@@ -67,91 +286,205 @@ class BaseScraper(ABC):
                     with open(path, 'r') as f:
                         proxies = [line.strip() for line in f if line.strip() and not line.startswith('#')]
                     if proxies:
-                        BaseScraper._proxy_list = proxies
-                        print(f"[BaseScraper] Loaded {len(proxies)} proxies from {path}")
+                        BaseScraper.proxy_pool.load(proxies)
+                        self.log.info("Loaded %d proxies from %s", len(proxies), path)
                         return
                 except Exception as e:
-                    print(f"[BaseScraper] Error loading proxy file {path}: {e}")
+                    self.log.error("Error loading proxy file %s: %s", path, e)
 
-        print("[BaseScraper] No proxies configured, using direct connection")
+        self.log.info("No proxies configured, using direct connection")
 
     def _get_proxy(self) -> Optional[Dict[str, str]]:
-        """Get a working proxy or try from list"""
-        if BaseScraper._working_proxy:
-            return {'http': BaseScraper._working_proxy, 'https': BaseScraper._working_proxy}
+        """Get the best healthy proxy from the pool"""
+        proxy = BaseScraper.proxy_pool.best()
+        if not proxy:
+            return None
+        return {'http': proxy, 'https': proxy}
+
+    def validate_proxies(self, probe_url: Optional[str] = None, workers: int = 20,
+                         timeout: float = 8) -> int:
+        """Probe all proxies in parallel so the pool starts ranked by real latency"""
+        probe_url = probe_url or self.base_url
+        if not len(BaseScraper.proxy_pool) or not probe_url:
+            return 0
+
+        def probe(proxy_url: str) -> bool:
+            response = self.scraper.get(probe_url, headers=self.headers, timeout=timeout,
+                                        proxies={'http': proxy_url, 'https': proxy_url})
+            return response.status_code < 400
 
-        if not BaseScraper._proxy_list:
+        healthy = BaseScraper.proxy_pool.validate(probe, workers=workers)
+        self.log.info("Proxy validation: %d/%d healthy", healthy, len(BaseScraper.proxy_pool))
+        return healthy
+
+    def get_raw(self, url: str, retries: int = 3) -> Optional['RawPage']:
+        """Fetch a page without parsing it - the tree is built only if a selector needs it"""
+        with self._host_slot(url):
+            html = self._fetch(url, retries)
+        if html is None:
             return None
+        return RawPage(url, html)
 
-        # Return first proxy to try
-        proxy = BaseScraper._proxy_list[0]
-        return {'http': proxy, 'https': proxy}
+    def get_page(self, url: str, retries: int = 3, parse_only: ParseScope = None) -> Optional[BeautifulSoup]:
+        """Fetch a page and return BeautifulSoup object
+
+        parse_only limits the tree to the parts the caller needs: a
+        SoupStrainer, or a list of CSS selectors whose matching subtrees are
+        kept (e.g. ['ul.episodes__list']).
+        """
+        page = self.get_raw(url, retries)
+        if page is None:
+            return None
+        return page.soup(parse_only)
 
-    def _mark_proxy_failed(self, proxy_url: str):
-        """Mark a proxy as failed and try next one"""
-        if proxy_url in BaseScraper._proxy_list:
-            BaseScraper._proxy_list.remove(proxy_url)
-            print(f"[BaseScraper] Removed failed proxy, {len(BaseScraper._proxy_list)} remaining")
-        if BaseScraper._working_proxy == proxy_url:
-            BaseScraper._working_proxy = None
-
-    def _mark_proxy_working(self, proxy_url: str):
-        """Mark a proxy as working"""
-        BaseScraper._working_proxy = proxy_url
-        print(f"[BaseScraper] Found working proxy: {proxy_url[:30]}...")
-
-    def get_page(self, url: str, retries: int = 3) -> Optional[BeautifulSoup]:
-        """Fetch a page and return BeautifulSoup object"""
-
-        # If we have a working proxy, use it first
-        if BaseScraper._working_proxy:
-            proxies = {'http': BaseScraper._working_proxy, 'https': BaseScraper._working_proxy}
+    def _parse(self, method: str, page: RawPage) -> Any:
+        """self.<method>(page), waiting for it - for callers that need the result before the next request"""
+        return self._parse_async(method, page).result()
+
+    def _parse_async(self, method: str, page: RawPage) -> Future:
+        """Run self.<method>(page) in BaseScraper.parse_pool when one is configured; returns a Future
+
+        method is the name of a _parse_* method that only reads the page and
+        returns plain data, so it can run in another process unchanged. With
+        the pool the Future comes back right away and the fetch thread can
+        start its next request; the worker's parse stats and extract timings
+        are merged in when the result arrives. Without it the page is parsed
+        here and the Future is already done.
+        """
+        parsed: Future = Future()
+        pool = BaseScraper.parse_pool
+        if pool is not None:
             try:
-                response = self.scraper.get(
-                    url,
-                    headers=self.headers,
-                    timeout=15,
-                    proxies=proxies
-                )
-                response.raise_for_status()
-                response.encoding = 'utf-8'
-                return BeautifulSoup(response.text, 'lxml')
-            except Exception as e:
-                print(f"[{self.source_name}] Working proxy failed: {str(e)[:50]}")
-                self._mark_proxy_failed(BaseScraper._working_proxy)
+                remote = pool.submit(type(self), method, page.url, page.text)
+            except BrokenProcessPool as e:
+                self._parse_pool_broken(e)
+            else:
+                start = time.perf_counter()
+                remote.add_done_callback(lambda done: self._parse_done(done, parsed, method, page, start))
+                return parsed
+        self._parse_inline(parsed, method, page)
+        return parsed
 
-        # Try other proxies from list
-        if BaseScraper._proxy_list:
-            for proxy_url in list(BaseScraper._proxy_list)[:20]:  # Try max 20 proxies
-                proxies = {'http': proxy_url, 'https': proxy_url}
-                try:
-                    response = self.scraper.get(
-                        url,
-                        headers=self.headers,
-                        timeout=10,
-                        proxies=proxies
-                    )
-                    response.raise_for_status()
-                    response.encoding = 'utf-8'
-                    self._mark_proxy_working(proxy_url)
-                    return BeautifulSoup(response.text, 'lxml')
-                except Exception as e:
-                    self._mark_proxy_failed(proxy_url)
-                    continue
+    def _parse_inline(self, parsed: Future, method: str, page: RawPage):
+        try:
+            parsed.set_result(getattr(self, method)(page))
+        except Exception as e:
+            parsed.set_exception(e)
+
+    def _parse_done(self, remote: Future, parsed: Future, method: str, page: RawPage, start: float):
+        try:
+            result, stats, samples = remote.result()
+        except BrokenProcessPool as e:
+            self._parse_pool_broken(e)
+            self._parse_inline(parsed, method, page)
+            return
+        except Exception as e:
+            parsed.set_exception(e)
+            return
+        BaseScraper.parse_stats.merge(stats)
+        metrics = BaseScraper.metrics
+        if metrics is not None:
+            metrics.observe('scraper_parse_pool_seconds', time.perf_counter() - start,
+                            source=self.source_name, method=method)
+            for name, value, labels in samples:
+                metrics.observe(name, value, **labels)
+        parsed.set_result(result)
+
+    def _parse_pool_broken(self, error: Exception):
+        # worker مات (OOM مثلاً) - نكمل التشغيل بالـ parse في نفس الـ thread
+        if BaseScraper.parse_pool is not None:
+            self.log.warning("Parse pool broken (%s), parsing in the fetch threads from now on", error)
+            BaseScraper.parse_pool = None
+
+    @contextmanager
+    def _measure(self, name: str, **labels):
+        """Time a block into BaseScraper.metrics; free when metrics are off"""
+        if BaseScraper.metrics is None:
+            yield
+            return
+        with BaseScraper.metrics.timer(name, source=self.source_name, **labels):
+            yield
+
+    def _record_request(self, url: str, proxies: Optional[Dict[str, str]], status: str,
+                        seconds: float, body: Optional[str] = None):
+        metrics = BaseScraper.metrics
+        if metrics is None:
+            return
+        host = urlparse(url).netloc
+        route = 'proxy' if proxies else 'direct'
+        metrics.observe('scraper_request_seconds', seconds, host=host, source=self.source_name,
+                        route=route, status=status)
+        if body is not None:
+            metrics.inc('scraper_response_bytes_total', len(body.encode('utf-8')), host=host,
+                        source=self.source_name)
+        if proxies:
+            metrics.inc('scraper_proxy_requests_total', proxy=urlparse(proxies['http']).netloc,
+                        outcome='error' if status == 'error' else 'ok')
+
+    def _request(self, url: str, timeout: float, proxies: Optional[Dict[str, str]] = None) -> Tuple[str, float]:
+        """Single GET through the rate limiter and the HTTP cache
+
+        Returns the decoded body and the seconds spent on the GET itself -
+        not the rate-limiter wait or the cache lookup - which is what the
+        proxy ranking compares.
+        """
+        headers = self.headers
+        cached = BaseScraper.http_cache.get(url) if BaseScraper.http_cache else None
+        if cached:
+            headers = dict(self.headers, **cached.validators())
+
+        self._throttle(url)
+        start = time.perf_counter()
+        try:
+            response = self.scraper.get(
+                url,
+                headers=headers,
+                timeout=timeout,
+                proxies=proxies
+            )
+            elapsed = time.perf_counter() - start
+            if cached and response.status_code == 304:
+                BaseScraper.http_cache.hit(cached)
+                self._record_request(url, proxies, '304', elapsed)
+                return cached.body, elapsed
+            response.raise_for_status()
+        except Exception:
+            self._record_request(url, proxies, 'error', time.perf_counter() - start)
+            raise
+        response.encoding = 'utf-8'
+        self._record_request(url, proxies, str(response.status_code), elapsed, response.text)
+        if BaseScraper.http_cache:
+            BaseScraper.http_cache.miss()
+            BaseScraper.http_cache.store(url, response.text, response.headers)
+        return response.text, elapsed
+
+    def _fetch(self, url: str, retries: int) -> Optional[str]:
+        # Try the best-ranked healthy proxies first
+        pool = BaseScraper.proxy_pool
+        for proxy_url in pool.candidates(BaseScraper.max_proxy_attempts):
+            proxies = {'http': proxy_url, 'https': proxy_url}
+            try:
+                html, seconds = self._request(url, timeout=BaseScraper.proxy_timeout, proxies=proxies)
+            except Exception as e:
+                self.log.warning("Proxy failed: %.50s", e, extra={'event': 'proxy_failed'})
+                pool.report_failure(proxy_url)
+                if BaseScraper.metrics is not None:
+                    BaseScraper.metrics.inc('scraper_retries_total', host=urlparse(url).netloc,
+                                            source=self.source_name, route='proxy')
+                continue
+            pool.report_success(proxy_url, seconds)
+            return html
 
         # Fallback to direct connection
         for attempt in range(retries):
             try:
-                response = self.scraper.get(
-                    url,
-                    headers=self.headers,
-                    timeout=30
-                )
-                response.raise_for_status()
-                response.encoding = 'utf-8'
-                return BeautifulSoup(response.text, 'lxml')
+                return self._request(url, timeout=30)[0]
             except Exception as e:
-                print(f"[{self.source_name}] Direct attempt {attempt + 1} failed: {str(e)[:50]}")
+                self.log.warning("Direct attempt %d failed: %.50s", attempt + 1, e,
+                                 extra={'event': 'request_retry'})
+                if BaseScraper.metrics is not None:
+                    BaseScraper.metrics.inc('scraper_retries_total', host=urlparse(url).netloc,
+                                            source=self.source_name, route='direct')
                 if attempt < retries - 1:
                     time.sleep(2 ** attempt)
         return None
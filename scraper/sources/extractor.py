@@ -0,0 +1,174 @@
+"""Metadata Extractor - محرك استخراج مشترك بأنماط regex متجمعة مسبقاً"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from bs4 import BeautifulSoup
+import json
+import re
+
+
+class FieldSpec:
+    """Declarative description of one metadata field
+
+    Patterns are tried in order against the page text. The first pattern
+    that matches produces the value (after `clean`); with
+    first_match_only=False a match whose cleaned value is None falls
+    through to the next pattern instead of ending the search.
+    """
+
+    def __init__(self, name: str, patterns: Sequence[str], flags: int = 0, group: int = 1,
+                 clean: Optional[Callable[[str], Any]] = None, first_match_only: bool = True):
+        self.name = name
+        self.regexes = [re.compile(p, flags) for p in patterns]
+        self.group = group
+        self.clean = clean
+        self.first_match_only = first_match_only
+
+    def extract(self, text: str) -> Any:
+        for regex in self.regexes:
+            match = regex.search(text)
+            if not match:
+                continue
+            value = match.group(self.group)
+            if self.clean:
+                value = self.clean(value)
+            if value is not None or self.first_match_only:
+                return value
+        return None
+
+
+class MetadataExtractor:
+    """Runs a list of FieldSpecs over one text pass and fills `info`"""
+
+    def __init__(self, specs: Sequence[FieldSpec]):
+        self.specs = list(specs)
+
+    def extract(self, text: str, info: Dict[str, Any], only_missing: Sequence[str] = ()) -> Dict[str, Any]:
+        """Fill info in place; fields listed in only_missing are skipped if already set"""
+        for spec in self.specs:
+            if spec.name in only_missing and info.get(spec.name):
+                continue
+            value = spec.extract(text)
+            if value is not None:
+                info[spec.name] = value
+        return info
+
+
+def iter_json_ld(soup: BeautifulSoup) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the objects of each JSON-LD block on the page (one list per block)"""
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.get_text(strip=True))
+        except ValueError:
+            continue
+        items = data if isinstance(data, list) else [data]
+        yield [item for item in items if isinstance(item, dict)]
+
+
+def json_ld_rating(soup: BeautifulSoup) -> float:
+    """AggregateRating.ratingValue from JSON-LD, 0.0 if missing
+
+    Inside a block the first rated object counts; a later block overrides
+    an earlier one.
+    """
+    rating = 0.0
+    for items in iter_json_ld(soup):
+        for item in items:
+            aggregate = item.get('AggregateRating')
+            value = aggregate.get('ratingValue') if isinstance(aggregate, dict) else None
+            if value:
+                try:
+                    rating = float(value)
+                except (TypeError, ValueError):
+                    pass
+                break
+    return rating
+
+
+# === دوال التنظيف ===
+
+_WHITESPACE = re.compile(r'\s+')
+_QUALITY = re.compile(r'(\d+p|WEB-?DL|BluRay|HDRip|DVDRip)', re.IGNORECASE)
+_MINUTES_AR = re.compile(r'(\d+)\s*دقيقة')
+_MINUTES_EN = re.compile(r'(\d+)\s*min', re.IGNORECASE)
+
+
+def _first_word(max_len: int, collapse_spaces: bool = False) -> Callable[[str], Optional[str]]:
+    def clean(value: str) -> Optional[str]:
+        value = value.strip()
+        if collapse_spaces:
+            value = _WHITESPACE.sub(' ', value)
+        if len(value) >= max_len:  # تجنب النصوص الطويلة
+            return None
+        return value.split()[0] if value else ''
+    return clean
+
+
+def _quality(value: str) -> Optional[str]:
+    match = _QUALITY.search(value.strip())
+    return match.group(1) if match else None
+
+
+def _duration(value: str) -> Optional[str]:
+    value = value.strip()
+    match = _MINUTES_AR.search(value)
+    if match:
+        return f"{match.group(1)} دقيقة"
+    match = _MINUTES_EN.search(value)
+    if match:
+        return f"{match.group(1)} min"
+    return None
+
+
+def _rating(value: str) -> Optional[float]:
+    try:
+        rating = float(value)
+    except ValueError:
+        return None
+    return rating if 0 < rating <= 10 else None
+
+
+# === مواصفات الحقول المشتركة بين المصادر ===
+
+YEAR = FieldSpec('year', [
+    r'السنة\s*[:\s]+\s*(\d{4})',
+    r'سنة الانتاج\s*[:\s]+\s*(\d{4})',
+    r'الإنتاج\s*[:\s]+\s*(\d{4})',
+    r'year\s*[:\s]+\s*(\d{4})',
+])
+
+COUNTRY = FieldSpec('country', [
+    r'انتاج\s*[:\s]+\s*([^\n\r]+)',
+    r'الانتاج\s*[:\s]+\s*([^\n\r]+)',
+    r'بلد الانتاج\s*[:\s]+\s*([^\n\r]+)',
+    r'country\s*[:\s]+\s*([^\n\r]+)',
+], flags=re.IGNORECASE, clean=_first_word(50, collapse_spaces=True))
+
+LANGUAGE = FieldSpec('language', [
+    r'اللغة\s*[:\s]+\s*([^\n\r]+)',
+    r'language\s*[:\s]+\s*([^\n\r]+)',
+], flags=re.IGNORECASE, clean=_first_word(30))
+
+QUALITY = FieldSpec('quality', [
+    r'الجودة\s*[:\s]+\s*([^\n\r]+)',
+    r'quality\s*[:\s]+\s*([^\n\r]+)',
+], flags=re.IGNORECASE, clean=_quality)
+
+DURATION = FieldSpec('duration', [
+    r'مدة المسلسل\s*[:\s]+\s*([^\n\r]+)',
+    r'المدة\s*[:\s]+\s*([^\n\r]+)',
+    r'duration\s*[:\s]+\s*([^\n\r]+)',
+], flags=re.IGNORECASE, clean=_duration)
+
+RATING = FieldSpec('rating', [
+    r'"ratingValue"\s*:\s*"?(\d+\.?\d*)"?',
+    r'(\d+\.?\d*)\s*/\s*10',
+    r'التقييم\s*[:\s]+\s*(\d+\.?\d*)',
+], flags=re.IGNORECASE, clean=_rating, first_match_only=False)
+
+AGE_RATING = FieldSpec('age_rating', [
+    r'(PG-?\d+|R|G|NC-17)',
+    r'للكبار فقط',
+    r'عائلي',
+], flags=re.IGNORECASE, group=0)
+
+COMMON_FIELDS: List[FieldSpec] = [YEAR, COUNTRY, LANGUAGE, QUALITY, DURATION]
@@ -0,0 +1,169 @@
+"""HTTP Cache - كاش على الديسك للصفحات مع Conditional GET (ETag / Last-Modified)"""
+
+from typing import Dict, Optional
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class CacheEntry:
+    """Cached response body plus the validators needed to revalidate it"""
+
+    def __init__(self, url: str, body: str, etag: str = '', last_modified: str = '',
+                 stored_at: float = 0.0):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def validators(self) -> Dict[str, str]:
+        """Headers for a conditional GET"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """On-disk cache keyed by URL, one JSON file per entry
+
+    An entry's age is its file mtime: a store writes the file and a 304
+    only touches it. Entries older than ttl_seconds are dropped on read and
+    by evict(); evict() also removes the least recently used entries until
+    the cache fits in max_bytes. The size is tracked as entries are stored,
+    and a store that takes it over max_bytes evicts down to 90% of it.
+    Writes go through a temp file + rename so concurrent workers never see
+    a half-written entry.
+    """
+
+    def __init__(self, cache_dir: Path, ttl_seconds: float = 7 * 24 * 3600,
+                 max_bytes: int = 300 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._bytes: Optional[int] = None  # بيتحسب أول مرة evict() تلف على الملفات
+        self._evicting = False
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        path = self._path(url)
+        try:
+            touched = path.stat().st_mtime
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - touched > self.ttl_seconds:
+            self._remove(path)
+            return None
+        return CacheEntry(url, data.get('body', ''), data.get('etag', ''),
+                          data.get('last_modified', ''), touched)
+
+    def store(self, url: str, body: str, headers) -> bool:
+        """Save a 200 response; responses without validators can't be revalidated so they are skipped"""
+        etag = headers.get('ETag', '')
+        last_modified = headers.get('Last-Modified', '')
+        if not etag and not last_modified:
+            return False
+        path = self._path(url)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'etag': etag, 'last_modified': last_modified,
+                       'stored_at': time.time(), 'body': body}, f, ensure_ascii=False)
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        added = tmp.stat().st_size - replaced
+        os.replace(tmp, path)
+        with self._lock:
+            self.stores += 1
+            over = self._bytes is None or self._bytes + added > self.max_bytes
+            if self._bytes is not None:
+                self._bytes += added
+            if over and not self._evicting:
+                self._evicting = True
+            else:
+                over = False
+        if over:
+            try:
+                self.evict(int(self.max_bytes * 0.9))
+            finally:
+                with self._lock:
+                    self._evicting = False
+        return True
+
+    def hit(self, entry: CacheEntry):
+        """Record a 304 - the entry is still valid, so restart its TTL (just the file mtime)"""
+        try:
+            os.utime(self._path(entry.url))
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """Drop expired entries, then oldest entries until under target_bytes (default max_bytes)"""
+        target_bytes = self.max_bytes if target_bytes is None else target_bytes
+        now = time.time()
+        removed = 0
+        entries = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._remove(path)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= target_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._bytes = total
+        # tmp قديم من worker وقع؛ الجديد ممكن يكون store شغال دلوقتي
+        for tmp in self.cache_dir.glob('*.tmp'):
+            try:
+                if now - tmp.stat().st_mtime > 3600:
+                    self._remove(tmp)
+            except OSError:
+                pass
+        return removed
+
+    def clear(self):
+        for path in self.cache_dir.glob('*.json'):
+            self._remove(path)
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits_304': self.hits, 'misses': self.misses, 'stored': self.stores}
@@ -0,0 +1,106 @@
+"""Parse Pool - الـ parse والاستخراج في processes منفصلة عشان الـ GIL ميوقفش threads الشبكة"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+from .parsing import ParseStats
+
+# scraper واحد لكل class في كل worker process - بيتعمل أول مرة بس
+_worker_scrapers: Dict[type, Any] = {}
+_worker_track_memory = False
+
+# (name, seconds, labels) لكل قياس جوه الاستخراج
+Sample = Tuple[str, float, Dict[str, Any]]
+
+
+class _Samples:
+    """Stands in for BaseScraper.metrics inside a worker: keeps the observe() samples to send back"""
+
+    def __init__(self):
+        self.samples: List[Sample] = []
+
+    def observe(self, name: str, value: float, **labels):
+        self.samples.append((name, value, labels))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        pass  # الـ counters بتاعة الشبكة بس، والـ worker مبيعملش requests
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+
+def _init_worker(track_memory: bool):
+    """Worker process: no proxies, cache or nested pool - it only ever sees page text"""
+    global _worker_track_memory
+    from .base import BaseScraper
+    BaseScraper._proxy_loaded = True
+    BaseScraper.http_cache = None
+    BaseScraper.metrics = None
+    BaseScraper.parse_pool = None
+    _worker_track_memory = track_memory
+    # اللوج بتاع الـ parent مش موجود هنا؛ الـ debug اللي جوه الاستخراج بيتشال
+    root = logging.getLogger('scraper')
+    root.handlers = [logging.NullHandler()]
+    root.propagate = False
+
+
+def _parse_task(cls: type, method: str, url: str,
+                text: str) -> Tuple[Any, Dict[str, Dict[str, float]], List[Sample]]:
+    """Run cls.<method>(RawPage) and return its plain result plus the parse stats and timings it recorded"""
+    from .base import BaseScraper, RawPage
+    scraper = _worker_scrapers.get(cls)
+    if scraper is None:
+        scraper = _worker_scrapers[cls] = cls()
+    stats = ParseStats()
+    if _worker_track_memory:
+        stats.enable_memory_tracking()
+    BaseScraper.parse_stats = stats
+    samples = BaseScraper.metrics = _Samples()
+    return getattr(scraper, method)(RawPage(url, text)), stats.summary(), samples.samples
+
+
+class ParsePool:
+    """Process pool for the CPU side of scraping: lxml trees, selectors, regex extraction
+
+    Fetch threads hand over the page text and the name of a scraper's
+    _parse_* method and get a Future back right away, so they can go on to
+    their next request; the result is the plain dicts/lists the method
+    returns, and the BeautifulSoup tree never leaves the worker. Workers
+    are spawned (not forked from a process full of threads and locks) on
+    first use.
+    """
+
+    def __init__(self, workers: int, track_memory: bool = False):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.track_memory = track_memory
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=(self.track_memory,))
+            return self._executor
+
+    def submit(self, cls: type, method: str, url: str, text: str) -> Future:
+        """Future of (result, parse stats summary, timing samples)"""
+        return self._pool().submit(_parse_task, cls, method, url, text)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
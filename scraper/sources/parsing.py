@@ -0,0 +1,148 @@
+"""Parsing - بناء شجرة جزئية من الصفحة (SoupStrainer) مع قياس وقت وذاكرة الـ parse"""
+
+from typing import Dict, Optional, Sequence, Tuple, Union
+from functools import lru_cache
+from bs4 import BeautifulSoup, SoupStrainer
+import re
+import threading
+import time
+import tracemalloc
+
+# نطاق الـ parse: SoupStrainer جاهز أو قائمة selectors
+ParseScope = Union[SoupStrainer, Sequence[str], None]
+
+_COMPOUND = re.compile(r'^[^\s>+~]+')
+_PART = re.compile(
+    r'(?P<tag>^[a-zA-Z][\w-]*)'
+    r'|\.(?P<cls>[\w-]+)'
+    r'|#(?P<id>[\w-]+)'
+    r'|\[(?P<attr>[\w-]+)(?:(?P<op>[*^$]?=)["\']?(?P<val>[^"\'\]]*)["\']?)?\]'
+)
+
+
+def _compile_compound(selector: str):
+    """Matcher for the first compound of a CSS selector (tag, .class, #id, [attr op val])"""
+    compound = _COMPOUND.match(selector.strip())
+    if not compound:
+        raise ValueError(f"Unsupported parse scope selector: {selector!r}")
+    tag, classes, checks = None, [], []
+    for part in _PART.finditer(compound.group(0)):
+        if part.group('tag'):
+            tag = part.group('tag').lower()
+        elif part.group('cls'):
+            classes.append(part.group('cls'))
+        elif part.group('id'):
+            checks.append(('id', '=', part.group('id')))
+        else:
+            checks.append((part.group('attr'), part.group('op'), part.group('val')))
+
+    def matches(name: str, attrs: Dict) -> bool:
+        if tag and name != tag:
+            return False
+        if classes:
+            value = attrs.get('class') or ''
+            present = value.split() if isinstance(value, str) else value
+            if not all(c in present for c in classes):
+                return False
+        for attr, op, expected in checks:
+            value = attrs.get(attr)
+            if value is None:
+                return False
+            if isinstance(value, list):
+                value = ' '.join(value)
+            if op == '=' and value != expected:
+                return False
+            if op == '*=' and expected not in value:
+                return False
+            if op == '^=' and not value.startswith(expected):
+                return False
+            if op == '$=' and not value.endswith(expected):
+                return False
+        return True
+
+    return matches
+
+
+@lru_cache(maxsize=64)
+def build_strainer(selectors: Tuple[str, ...]) -> SoupStrainer:
+    """SoupStrainer keeping every subtree whose root matches one of the selectors
+
+    Only the first compound of each selector is used (`ul.episodes__list li a`
+    keeps whole `ul.episodes__list` subtrees), so the full selector still
+    works on the partial tree with soup.select().
+    """
+    matchers = [_compile_compound(s) for s in selectors]
+    return SoupStrainer(lambda name, attrs: any(m(name, attrs) for m in matchers))
+
+
+class ParseStats:
+    """CPU time and peak memory per parse scope
+
+    Peak memory needs tracemalloc, which slows every allocation in the
+    process, so it is only collected when track_memory is enabled. With
+    several worker threads parsing at once the peak is process-wide and
+    therefore an upper bound.
+    """
+
+    def __init__(self):
+        self.track_memory = False
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def enable_memory_tracking(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.track_memory = True
+
+    def record(self, scope: str, cpu_seconds: float, peak_bytes: int, html_bytes: int):
+        with self._lock:
+            stats = self._stats.setdefault(scope, {'pages': 0, 'cpu_seconds': 0.0,
+                                                   'peak_bytes': 0, 'html_bytes': 0})
+            stats['pages'] += 1
+            stats['cpu_seconds'] += cpu_seconds
+            stats['peak_bytes'] = max(stats['peak_bytes'], peak_bytes)
+            stats['html_bytes'] += html_bytes
+
+    def merge(self, summary: Dict[str, Dict[str, float]]):
+        """Add the summary() of another ParseStats (a parse pool worker's) to this one"""
+        with self._lock:
+            for scope, other in summary.items():
+                stats = self._stats.setdefault(scope, {'pages': 0, 'cpu_seconds': 0.0,
+                                                       'peak_bytes': 0, 'html_bytes': 0})
+                stats['pages'] += other['pages']
+                stats['cpu_seconds'] += other['cpu_seconds']
+                stats['peak_bytes'] = max(stats['peak_bytes'], other['peak_bytes'])
+                stats['html_bytes'] += other['html_bytes']
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {scope: dict(stats) for scope, stats in self._stats.items()}
+
+
+def scope_label(parse_only: ParseScope) -> str:
+    if parse_only is None:
+        return 'full'
+    if isinstance(parse_only, SoupStrainer):
+        return 'strainer'
+    return ','.join(parse_only)
+
+
+def parse_html(html: str, parse_only: ParseScope = None,
+               stats: Optional[ParseStats] = None) -> BeautifulSoup:
+    """Build a (possibly partial) lxml tree and record its cost"""
+    strainer = parse_only
+    if parse_only is not None and not isinstance(parse_only, SoupStrainer):
+        strainer = build_strainer(tuple(parse_only))
+
+    track_memory = stats is not None and stats.track_memory
+    if track_memory:
+        tracemalloc.reset_peak()
+        base_memory = tracemalloc.get_traced_memory()[0]
+    # thread_time = وقت المعالج للـ thread ده بس، حتى لو فيه workers تانيين شغالين
+    start = time.thread_time()
+    soup = BeautifulSoup(html, 'lxml', parse_only=strainer)
+    cpu_seconds = time.thread_time() - start
+    if stats is not None:
+        peak = tracemalloc.get_traced_memory()[1] - base_memory if track_memory else 0
+        stats.record(scope_label(parse_only), cpu_seconds, peak, len(html))
+    return soup
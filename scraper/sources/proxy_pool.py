@@ -0,0 +1,108 @@
+"""Proxy Pool - ترتيب البروكسيات حسب السرعة ونسبة النجاح مع عقوبة مؤقتة للفاشل"""
+
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+class ProxyStats:
+    """Health record for one proxy"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None  # EWMA بالثواني
+        self.reliability = 0.5                # EWMA لنسبة النجاح (0..1)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.penalty_until = 0.0
+
+    def score(self) -> float:
+        """Expected seconds per successful request - lower is better"""
+        latency = self.latency if self.latency is not None else 5.0
+        return latency / max(self.reliability, 0.05)
+
+
+class ProxyPool:
+    """Thread-safe pool shared by every scraper and worker
+
+    A failing proxy is not deleted: it is benched for base_penalty seconds,
+    doubling with each consecutive failure up to max_penalty, and comes back
+    into rotation once the penalty runs out. One success clears the streak.
+    """
+
+    def __init__(self, base_penalty: float = 30.0, max_penalty: float = 1800.0):
+        self.base_penalty = base_penalty
+        self.max_penalty = max_penalty
+        self._stats: Dict[str, ProxyStats] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def load(self, proxies: List[str]):
+        with self._lock:
+            self._stats = {url: ProxyStats(url) for url in proxies}
+
+    def candidates(self, limit: int = 3) -> List[str]:
+        """Best healthy proxies, ranked by latency and success rate"""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [s for s in self._stats.values() if s.penalty_until <= now]
+            healthy.sort(key=lambda s: s.score())
+            return [s.url for s in healthy[:limit]]
+
+    def best(self) -> Optional[str]:
+        ranked = self.candidates(1)
+        return ranked[0] if ranked else None
+
+    def report_success(self, url: str, latency: float):
+        with self._lock:
+            stats = self._stats.get(url)
+            if not stats:
+                return
+            stats.latency = latency if stats.latency is None else 0.7 * stats.latency + 0.3 * latency
+            stats.reliability = 0.7 * stats.reliability + 0.3
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.penalty_until = 0.0
+
+    def report_failure(self, url: str):
+        with self._lock:
+            stats = self._stats.get(url)
+            if not stats:
+                return
+            stats.reliability *= 0.7
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            penalty = min(self.base_penalty * 2 ** (stats.consecutive_failures - 1), self.max_penalty)
+            stats.penalty_until = time.monotonic() + penalty
+
+    def validate(self, probe: Callable[[str], bool], workers: int = 20) -> int:
+        """Probe every proxy in parallel, record latency/outcome, return healthy count"""
+        def run(url: str):
+            start = time.monotonic()
+            try:
+                ok = probe(url)
+            except Exception:
+                ok = False
+            if ok:
+                self.report_success(url, time.monotonic() - start)
+            else:
+                self.report_failure(url)
+            return ok
+
+        with self._lock:
+            urls = list(self._stats)
+        if not urls:
+            return 0
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls)))) as pool:
+            return sum(1 for ok in pool.map(run, urls) if ok)
+
+    def summary(self) -> Dict[str, int]:
+        now = time.monotonic()
+        with self._lock:
+            penalized = sum(1 for s in self._stats.values() if s.penalty_until > now)
+            return {'total': len(self._stats), 'healthy': len(self._stats) - penalized,
+                    'penalized': penalized}
@@ -0,0 +1,7 @@
+from .fingerprints import FingerprintIndex
+from .log import configure_logging, get_logger
+from .storage import JsonStorage, SqliteStorage, Storage
+from .writer import JsonWriter, content_hash
+
+__all__ = ['FingerprintIndex', 'JsonStorage', 'JsonWriter', 'SqliteStorage', 'Storage', 'configure_logging',
+           'content_hash', 'get_logger']
@@ -0,0 +1,55 @@
+"""Catalog - تقسيم series.json لصفحات ثابتة الحجم مع manifest فيه الـ hash بتاع كل صفحة"""
+
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+from .dates import parse_arabic_date
+from .storage import JsonStorage
+from .writer import content_hash
+
+
+def sort_by_last_episode(series: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Newest last_episode_date first; series without a parsable date go last"""
+    def key(item: Dict[str, Any]):
+        date = parse_arabic_date(item.get('last_episode_date', ''))
+        return (date is None, -(date.timestamp() if date else 0), str(item.get('id', '')))
+    return sorted(series, key=key)
+
+
+class CatalogPager:
+    """Writes data/catalog/page-NNN.json pages plus manifest.json
+
+    The manifest lists every page's URL (relative to data/), series count
+    and content hash, so a client renders page 1 after a few KB and only
+    refetches pages whose hash changed. Pages left over from a longer
+    catalog are removed.
+    """
+
+    def __init__(self, files: JsonStorage, page_size: int = 50):
+        self.files = files
+        self.out_dir = files.data_dir / "catalog"
+        self.page_size = max(1, page_size)
+
+    def write(self, series: List[Dict[str, Any]], last_updated: Optional[str] = None) -> Dict[str, Any]:
+        last_updated = last_updated or datetime.utcnow().isoformat() + 'Z'
+        ordered = sort_by_last_episode(series)
+        chunks = [ordered[i:i + self.page_size] for i in range(0, len(ordered), self.page_size)] or [[]]
+
+        pages = []
+        for number, chunk in enumerate(chunks, 1):
+            name = f"page-{number:03d}.json"
+            page = {'page': number, 'total_pages': len(chunks), 'series': chunk}
+            self.files.write_file(self.out_dir / name, page)
+            pages.append({'url': f"catalog/{name}", 'count': len(chunk), 'hash': content_hash(page)})
+
+        # صفحات زيادة من كتالوج أطول في تشغيل قبل كده
+        for stale in self.out_dir.glob('page-*.json'):
+            if int(stale.stem.split('-')[1]) > len(chunks):
+                self.files.remove_file(stale)
+
+        manifest = {
+            'last_updated': last_updated, 'total': len(ordered), 'page_size': self.page_size,
+            'sort': 'last_episode_date', 'pages': pages
+        }
+        self.files.write_file(self.out_dir / "manifest.json", manifest)
+        return manifest
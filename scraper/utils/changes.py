@@ -0,0 +1,176 @@
+"""Change Log - manifest مرقم لكل تشغيل فيه الملفات اللي اتضافت/اتعدلت عشان التطبيق يزامن الفرق بس"""
+
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import threading
+
+from .log import get_logger
+from .writer import JsonWriter, content_hash
+
+log = get_logger('Changes')
+
+# الملفات اللي التطبيق بيقراها (نسبة لـ data/)
+TRACKED_GLOBS = ('series.json', 'series/*.json', 'episodes/*.json', 'bundles/*.json', 'catalog/*.json')
+
+
+class ChangeLog:
+    """Sequenced change manifests in data/changes/
+
+    head.json points at the latest checkpoint (a full path -> hash map) and
+    the deltas written since it. A client that synced at seq N applies the
+    deltas after N; if N is older than the checkpoint it diffs against the
+    checkpoint first. Every checkpoint_every deltas are folded into a new
+    checkpoint and the old files removed, so the chain stays short.
+
+    Every recorded change is also appended to data/state/changes_pending.jsonl
+    as it happens, so a run that is killed before commit() leaves the list
+    behind; the next run folds it back in and its commit() includes them.
+    """
+
+    def __init__(self, data_dir: Path, writer: Optional[JsonWriter] = None, checkpoint_every: int = 20):
+        self.data_dir = Path(data_dir)
+        self.out_dir = self.data_dir / "changes"
+        self.writer = writer or JsonWriter()
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.pending_path = self.data_dir / "state" / "changes_pending.jsonl"
+        self._pending: Dict[str, Optional[str]] = self._load_pending()
+        self._pending_file = None
+        self._lock = threading.Lock()
+        if self._pending:
+            log.info("%d changes left by an interrupted run, adding them to the next delta", len(self._pending))
+
+    def _rel(self, path: Path) -> str:
+        return Path(path).resolve().relative_to(self.data_dir.resolve()).as_posix()
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.out_dir / name, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_pending(self) -> Dict[str, Optional[str]]:
+        pending: Dict[str, Optional[str]] = {}
+        try:
+            with open(self.pending_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # سطر ناقص من تشغيل اتقتل وهو بيكتب
+                    pending[entry['path']] = entry['hash']
+        except OSError:
+            pass
+        return pending
+
+    def _append_pending(self, rel: str, new_hash: Optional[str]):
+        """Called with the lock held; flushed right away, fsynced by sync()"""
+        if self._pending_file is None:
+            self.pending_path.parent.mkdir(parents=True, exist_ok=True)
+            self._pending_file = open(self.pending_path, 'a', encoding='utf-8')
+        self._pending_file.write(json.dumps({'path': rel, 'hash': new_hash}, ensure_ascii=False) + '\n')
+        self._pending_file.flush()
+
+    def record(self, path: Path, data: Any):
+        rel, new_hash = self._rel(path), content_hash(data)
+        with self._lock:
+            self._pending[rel] = new_hash
+            self._append_pending(rel, new_hash)
+
+    def record_removed(self, path: Path):
+        rel = self._rel(path)
+        with self._lock:
+            self._pending[rel] = None
+            self._append_pending(rel, None)
+
+    def sync(self):
+        """fsync the pending list - called once per finished series, before the run journal marks it done"""
+        with self._lock:
+            if self._pending_file is not None:
+                os.fsync(self._pending_file.fileno())
+
+    def head(self) -> Dict[str, Any]:
+        return self._read("head.json") or {'seq': 0, 'checkpoint': None, 'deltas': []}
+
+    def _known(self, head: Dict[str, Any]) -> Dict[str, str]:
+        """Current path -> hash map: last checkpoint plus its deltas, or a scan of the tree"""
+        if not head.get('checkpoint'):
+            known = {}
+            for pattern in TRACKED_GLOBS:
+                for path in sorted(self.data_dir.glob(pattern)):
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            known[self._rel(path)] = content_hash(json.load(f))
+                    except (OSError, ValueError):
+                        continue
+            return known
+        checkpoint = self._read(Path(head['checkpoint']['url']).name) or {}
+        known = dict(checkpoint.get('files', {}))
+        for delta in head.get('deltas', []):
+            for change in (self._read(Path(delta['url']).name) or {}).get('changes', []):
+                if change['status'] == 'removed':
+                    known.pop(change['path'], None)
+                else:
+                    known[change['path']] = change['hash']
+        return known
+
+    def commit(self) -> Optional[int]:
+        """Write this run's delta (and a checkpoint when due); returns the new seq or None"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            self._clear_pending()
+            return None
+
+        head = self.head()
+        # أول مرة مفيش checkpoint: الشجرة بتتمسح بعد الكتابة فكل التغييرات بتطلع updated
+        known = self._known(head)
+        seq = head['seq'] + 1
+        generated_at = datetime.utcnow().isoformat() + 'Z'
+
+        changes: List[Dict[str, Any]] = []
+        for rel, new_hash in sorted(pending.items()):
+            if new_hash is None:
+                changes.append({'path': rel, 'status': 'removed'})
+                known.pop(rel, None)
+            else:
+                changes.append({'path': rel, 'hash': new_hash,
+                                'status': 'updated' if rel in known else 'added'})
+                known[rel] = new_hash
+        name = f"delta-{seq:06d}.json"
+        self.writer.write(self.out_dir / name, {'seq': seq, 'generated_at': generated_at, 'changes': changes})
+        deltas = head.get('deltas', []) + [{'seq': seq, 'url': f"changes/{name}", 'count': len(changes)}]
+        checkpoint = head.get('checkpoint')
+
+        if checkpoint is None or len(deltas) >= self.checkpoint_every:
+            name = f"checkpoint-{seq:06d}.json"
+            self.writer.write(self.out_dir / name, {'seq': seq, 'generated_at': generated_at, 'files': known})
+            checkpoint = {'seq': seq, 'url': f"changes/{name}", 'count': len(known)}
+            deltas = []
+            for old in self.out_dir.glob('*.json'):
+                if old.name not in ('head.json', name):
+                    old.unlink()
+
+        self.writer.write(self.out_dir / "head.json", {
+            'seq': seq, 'generated_at': generated_at, 'checkpoint': checkpoint, 'deltas': deltas
+        })
+        self._clear_pending()
+        log.info("seq %d: %d files changed", seq, len(changes))
+        return seq
+
+    def _clear_pending(self):
+        """The delta is on disk - the pending list is done with"""
+        with self._lock:
+            if self._pending_file is not None:
+                self._pending_file.close()
+                self._pending_file = None
+            # اللي اتسجل بعد ما commit أخد النسخة بيفضل للـ delta الجاي
+            if self._pending:
+                self.pending_path.write_text(''.join(
+                    json.dumps({'path': rel, 'hash': h}, ensure_ascii=False) + '\n'
+                    for rel, h in self._pending.items()), encoding='utf-8')
+            elif self.pending_path.exists():
+                self.pending_path.unlink()
@@ -0,0 +1,68 @@
+"""Dates - تحويل تواريخ أكوام العربية لـ datetime عشان الترتيب، وتواريخ ISO اللي في ملفات الـ state"""
+
+from typing import Optional
+from datetime import datetime
+import re
+
+ARABIC_MONTHS = {
+    'يناير': 1, 'فبراير': 2, 'مارس': 3, 'ابريل': 4, 'أبريل': 4, 'إبريل': 4,
+    'مايو': 5, 'يونيو': 6, 'يوليو': 7, 'اغسطس': 8, 'أغسطس': 8,
+    'سبتمبر': 9, 'اكتوبر': 10, 'أكتوبر': 10, 'نوفمبر': 11, 'ديسمبر': 12,
+}
+
+# مثال: "الثلاثاء 02 يونيو 2026 - 11:13 مساءاً"
+_ARABIC_DATE = re.compile(
+    r'(?P<day>\d{1,2})\s+(?P<month>[^\s\d]+)\s+(?P<year>\d{4})'
+    r'(?:\s*-\s*(?P<hour>\d{1,2}):(?P<minute>\d{2})\s*(?P<period>[^\s\d]*))?'
+)
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+
+def parse_arabic_date(text: str) -> Optional[datetime]:
+    """Parse an Akwam date ('الثلاثاء 02 يونيو 2026 - 11:13 مساءاً') or an ISO date; None if unknown"""
+    if not text:
+        return None
+    text = text.strip()
+    if _ISO_DATE.match(text):
+        try:
+            return datetime.fromisoformat(text.rstrip('Z'))
+        except ValueError:
+            return None
+
+    match = _ARABIC_DATE.search(text)
+    if not match:
+        return None
+    month = ARABIC_MONTHS.get(match.group('month'))
+    if not month:
+        return None
+    hour = int(match.group('hour') or 0)
+    minute = int(match.group('minute') or 0)
+    period = match.group('period') or ''
+    # صباحا / مساءا(ً) - نظام 12 ساعة
+    if period.startswith('م') and hour < 12:
+        hour += 12
+    elif period.startswith('ص') and hour == 12:
+        hour = 0
+    try:
+        return datetime(int(match.group('year')), month, int(match.group('day')), hour, minute)
+    except ValueError:
+        return None
+
+
+def utc_now() -> datetime:
+    return datetime.utcnow()
+
+
+def to_iso(moment: datetime) -> str:
+    """UTC datetime -> '2026-06-02T23:13:00Z' as stored in data/state/"""
+    return moment.isoformat() + 'Z'
+
+
+def parse_iso(value: Optional[str]) -> Optional[datetime]:
+    """Inverse of to_iso(); None for a missing or malformed value"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.rstrip('Z'))
+    except ValueError:
+        return None
@@ -0,0 +1,131 @@
+"""Change Feed - صفحات "أحدث الحلقات" بتقول مين اتغير بدل ما نزور كل مسلسل كل تشغيل"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+import json
+import re
+
+from .dates import parse_iso, to_iso, utc_now
+from .writer import JsonWriter
+
+
+def slug_key(slug: str) -> str:
+    """ArabSeed slug -> series key: no "مسلسل-" prefix, nothing from "الحلقة" on
+
+    مسلسل-المدينة-البعيدة-الموسم-الثاني-الحلقة-70-مترجمة -> المدينة-البعيدة-الموسم-الثاني
+    """
+    slug = unquote(slug).strip('/').split('/')[-1].lower()
+    slug = re.sub(r'^مسلسل-', '', slug)
+    return re.split(r'-(?:الحلقة|حلقة)(?:-|$)', slug)[0].strip('-')
+
+
+def _path_parts(url: str) -> List[str]:
+    return [unquote(part) for part in urlparse(url).path.strip('/').split('/')]
+
+
+class FeedMatcher:
+    """Maps latest-episodes entries to configured series ids
+
+    Akwam episode URLs (/episode/<id>/<series-slug>/...) carry the slug that
+    ends the configured /series/<id>/<slug> URL. ArabSeed episode slugs are
+    the series slug plus "-الحلقة-N..."; configured /selary/ slugs are
+    sometimes cut short, so an exact key wins, then the longest series key
+    the episode key starts with, then a series key that starts with it.
+    """
+
+    def __init__(self, series_configs: Iterable[Dict[str, Any]]):
+        self.akwam_slugs: Dict[str, str] = {}
+        self.arabseed_keys: Dict[str, str] = {}
+        for cfg in series_configs:
+            sources = cfg.get('sources', {})
+            akwam = sources.get('akwam', {}).get('url')
+            if akwam:
+                parts = _path_parts(akwam)
+                if len(parts) >= 3 and parts[0] == 'series':
+                    self.akwam_slugs[parts[2]] = cfg['id']
+            arabseed = sources.get('arabseed', {}).get('url')
+            if arabseed:
+                self.arabseed_keys[slug_key(arabseed)] = cfg['id']
+
+    def match(self, source: str, entry: Dict[str, Any]) -> Optional[str]:
+        if source == 'akwam':
+            return self.akwam_slugs.get(unquote(entry.get('series_slug', '')))
+        if source == 'arabseed':
+            key = slug_key(entry.get('slug') or entry.get('url', ''))
+            if key in self.arabseed_keys:
+                return self.arabseed_keys[key]
+            prefixes = [k for k in self.arabseed_keys if key.startswith(k + '-')]
+            if prefixes:
+                return self.arabseed_keys[max(prefixes, key=len)]
+            truncated = [k for k in self.arabseed_keys if k.startswith(key + '-')]
+            if truncated:
+                return self.arabseed_keys[min(truncated, key=len)]
+        return None
+
+
+class ChangeFeed:
+    """Decides which series a run has to visit, from the sources' latest-episodes pages
+
+    An entry marks its series as changed when its episode number is past
+    the last_episode in the catalog (or has no number). When the feed can't
+    be trusted - a listing page failed, or the last page read is still all
+    new episodes so older changes may have scrolled off - affected() returns
+    None and the caller does a full sweep. A full sweep is also due every
+    full_sweep_hours (state in data/state/feed.json) to pick up edits the
+    feed never shows: fixed servers, metadata, removed episodes.
+    """
+
+    def __init__(self, path: Path, writer: Optional[JsonWriter] = None, full_sweep_hours: float = 24,
+                 pages: int = 2, urls: Optional[Dict[str, str]] = None):
+        self.path = Path(path)
+        self.writer = writer or JsonWriter()
+        self.full_sweep_hours = full_sweep_hours
+        self.pages = max(1, int(pages))
+        self.urls = dict(urls or {})
+        self.fallback_reason = ''
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._state: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+
+    def full_sweep_due(self, now: Optional[datetime] = None) -> bool:
+        last = parse_iso(self._state.get('last_full_sweep'))
+        return last is None or (now or utc_now()) - last >= timedelta(hours=self.full_sweep_hours)
+
+    def sweep_done(self, now: Optional[datetime] = None):
+        self._state['last_full_sweep'] = to_iso(now or utc_now())
+        self.save()
+
+    def affected(self, feeds: Dict[str, Optional[List[Dict[str, Any]]]], matcher: FeedMatcher,
+                 last_episodes: Dict[str, int]) -> Optional[Set[str]]:
+        """Series ids with episodes newer than the catalog, or None when a full sweep is needed"""
+        changed: Set[str] = set()
+        for source, entries in feeds.items():
+            if entries is None:
+                self.fallback_reason = f"{source} listing failed"
+                return None
+            last_page = max((e.get('page', 1) for e in entries), default=0)
+            last_page_new = 0
+            last_page_known = 0
+            for entry in entries:
+                series_id = matcher.match(source, entry)
+                if not series_id:
+                    continue
+                number = entry.get('number')
+                new = number is None or number > last_episodes.get(series_id, 0)
+                if new:
+                    changed.add(series_id)
+                if entry.get('page', 1) == last_page:
+                    last_page_new += new
+                    last_page_known += not new
+            if last_page_new and not last_page_known:
+                # آخر صفحة قريناها كلها جديدة - ممكن يكون فيه تغييرات أقدم منها
+                self.fallback_reason = f"{source} page {last_page} is all new episodes"
+                return None
+        return changed
+
+    def save(self):
+        self.writer.write(self.path, self._state)
@@ -0,0 +1,55 @@
+"""Fingerprint Index - بصمة لقائمة حلقات كل مصدر عشان نتخطى المسلسلات اللي متغيرتش"""
+
+from typing import Any, Dict
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+
+
+class FingerprintIndex:
+    """Persistent {series_id: {source: hash}} map stored as JSON
+
+    A fingerprint covers everything a source returned for a series (metadata
+    and episode list). When every source of a series still has the same
+    fingerprint as last run, nothing downstream can change.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._index: Dict[str, Dict[str, str]] = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    @staticmethod
+    def compute(data: Any) -> str:
+        canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    def matches(self, series_id: str, fingerprints: Dict[str, str]) -> bool:
+        if not fingerprints:
+            return False
+        with self._lock:
+            return self._index.get(series_id) == fingerprints
+
+    def update(self, series_id: str, fingerprints: Dict[str, str]):
+        with self._lock:
+            if self._index.get(series_id) != fingerprints:
+                self._index[series_id] = fingerprints
+                self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
@@ -0,0 +1,90 @@
+"""Run Journal - سجل JSONL لكل مسلسل خلص في التشغيل عشان نكمل من مكان ما وقفنا"""
+
+from typing import Any, Dict, Optional
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import threading
+import uuid
+
+
+class RunJournal:
+    """Append-only journal of one scrape_all run in data/state/journal.jsonl
+
+    Every finished series is appended and fsynced right away, so a run that
+    is killed mid-way leaves a journal without a 'complete' line. The next
+    run started with --resume skips the series listed there and rebuilds
+    series.json from their journaled summaries. A completed run is trimmed
+    back to its start/complete lines to keep the file small.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.run: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.run is not None
+
+    def _append(self, entry: Dict[str, Any]):
+        entry['time'] = datetime.utcnow().isoformat() + 'Z'
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _entries(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # سطر ناقص من تشغيل اتقتل وهو بيكتب
+        except OSError:
+            return
+
+    def interrupted_run(self) -> Optional[Dict[str, Any]]:
+        """The last run if it never completed: its start entry plus {series_id: summary}"""
+        start, series = None, {}
+        for entry in self._entries():
+            if entry.get('event') == 'start':
+                start, series = entry, {}
+            elif entry.get('event') == 'series' and start:
+                series[entry['id']] = entry['summary']
+            elif entry.get('event') == 'complete':
+                start = None
+        return {'start': start, 'series': series} if start else None
+
+    def start(self, **info):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.run = dict(info, event='start', run_id=uuid.uuid4().hex[:12],
+                        time=datetime.utcnow().isoformat() + 'Z')
+        with self._lock:
+            self.path.write_text('', encoding='utf-8')
+        self._append(dict(self.run))
+
+    def resume(self, run: Dict[str, Any]):
+        self.run = run['start']
+        self._append({'event': 'resume', 'run_id': self.run['run_id'], 'done': len(run['series'])})
+
+    def series_done(self, series_id: str, summary: Dict[str, Any]):
+        if self.active:
+            self._append({'event': 'series', 'id': series_id, 'summary': summary})
+
+    def complete(self, total: int):
+        if not self.active:
+            return
+        done = {'event': 'complete', 'run_id': self.run['run_id'], 'total': total,
+                'time': datetime.utcnow().isoformat() + 'Z'}
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with self._lock:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for entry in (self.run, done):
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            os.replace(tmp, self.path)
+        self.run = None
@@ -0,0 +1,188 @@
+"""Logging - loggers لكل مصدر مع كتابة في thread منفصل و sampling و JSON lines"""
+
+from typing import Any, Dict, Optional, TextIO
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+ROOT = 'scraper'
+
+# صفات LogRecord الأساسية - أي حاجة غيرها جاية من extra وبتطلع حقول في JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def get_logger(tag: str) -> logging.Logger:
+    """Logger for one source / component; its tag is printed as [Tag]"""
+    return logging.getLogger(f"{ROOT}.{tag}")
+
+
+def _tag(record: logging.LogRecord) -> str:
+    return record.name[len(ROOT) + 1:] if record.name.startswith(ROOT + '.') else record.name
+
+
+class TextFormatter(logging.Formatter):
+    """[Tag] message - the same lines the scraper always printed, plus the level for warnings"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        level = f"{record.levelname}: " if record.levelno >= logging.WARNING else ''
+        line = f"[{_tag(record)}] {level}{record.getMessage()}"
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, source, msg, event and any extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) +
+                    f".{int(record.msecs):03d}Z",
+            'level': record.levelname.lower(),
+            'source': _tag(record),
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class EventSampler(logging.Filter):
+    """Keep 1 in N records of each high-volume event (records with extra={'event': ...})
+
+    Counting instead of random sampling keeps the output deterministic; the
+    first record of every event always passes so a run shows each kind once.
+    """
+
+    def __init__(self, every: Dict[str, int]):
+        super().__init__()
+        self.every = {event: int(n) for event, n in (every or {}).items() if int(n) > 1}
+        self.seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, 'event', None)
+        n = self.every.get(event)
+        if not n:
+            return True
+        with self._lock:
+            count = self.seen.get(event, 0)
+            self.seen[event] = count + 1
+        if count % n:
+            return False
+        record.sampled = n
+        return True
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {event: {'seen': count, 'kept': (count + self.every[event] - 1) // self.every[event]}
+                    for event, count in self.seen.items()}
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record as is - formatting happens on the listener thread, not in the scrape loop"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """StreamHandler that flushes every flush_seconds instead of after every line"""
+
+    def __init__(self, stream: TextIO, flush_seconds: float = 1.0):
+        super().__init__(stream)
+        self.flush_seconds = flush_seconds
+        self._flushed = time.monotonic()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        now = time.monotonic()
+        if now - self._flushed >= self.flush_seconds:
+            self.flush()
+            self._flushed = now
+
+
+class LogSetup:
+    """The configured pipeline: loggers -> sampler -> queue -> listener thread -> stream"""
+
+    def __init__(self, listener: logging.handlers.QueueListener, handler: logging.Handler,
+                 sampler: EventSampler):
+        self.listener = listener
+        self.handler = handler
+        self.sampler = sampler
+
+    def stop(self):
+        if self.listener is None:
+            return
+        self.listener.stop()
+        self.listener = None
+        skipped = {event: stats for event, stats in self.sampler.summary().items()
+                   if stats['seen'] > stats['kept']}
+        if skipped:
+            # الملخص بيتكتب مباشرة لأن الـ listener وقف
+            text = ', '.join(f"{event} {stats['kept']}/{stats['seen']}" for event, stats in sorted(skipped.items()))
+            self.handler.handle(logging.LogRecord(f"{ROOT}.Log", logging.INFO, __file__, 0,
+                                                  'Sampled events kept: %s', (text,), None))
+        self.handler.flush()
+
+
+_active: Optional[LogSetup] = None
+_active_lock = threading.Lock()
+
+
+def configure_logging(settings: Optional[Dict[str, Any]] = None, level: Optional[str] = None,
+                      fmt: Optional[str] = None, stream: Optional[TextIO] = None) -> LogSetup:
+    """Set up the `scraper` logger tree from config.json `settings.logging`
+
+    {"level": "INFO", "format": "text" | "json", "flush_seconds": 1,
+     "sample": {"file_saved": 100, "request_retry": 10}}
+
+    level / fmt override the settings (CLI flags). Records below the level
+    are dropped by Logger.isEnabledFor before any message is built, so
+    debug tracing in the hot loops costs one cached comparison when off.
+    Calling it again replaces the previous setup.
+    """
+    global _active
+    settings = settings or {}
+    handler = BufferedStreamHandler(stream or sys.stdout, float(settings.get('flush_seconds', 1.0)))
+    handler.setFormatter(JsonFormatter() if (fmt or settings.get('format', 'text')) == 'json'
+                         else TextFormatter())
+    sampler = EventSampler(settings.get('sample', {}))
+    queue_handler = _DeferredQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(sampler)
+    listener = logging.handlers.QueueListener(queue_handler.queue, handler)
+
+    with _active_lock:
+        if _active:
+            _active.stop()
+        root = logging.getLogger(ROOT)
+        for old in list(root.handlers):
+            root.removeHandler(old)
+        root.addHandler(queue_handler)
+        root.setLevel(str(level or settings.get('level', 'INFO')).upper())
+        root.propagate = False
+        listener.start()
+        _active = LogSetup(listener, handler, sampler)
+        return _active
+
+
+def shutdown_logging():
+    """Drain the queue and flush - registered with atexit"""
+    with _active_lock:
+        if _active:
+            _active.stop()
+
+
+atexit.register(shutdown_logging)
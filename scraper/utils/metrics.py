@@ -0,0 +1,129 @@
+"""Metrics - قياسات لكل request ومرحلة (latency / bytes / retries / parse / write) وتصديرها JSON و Prometheus"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from pathlib import Path
+import json
+import math
+import os
+import threading
+import time
+
+Labels = Tuple[Tuple[str, str], ...]
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not values:
+        return 0.0
+    return values[max(0, min(len(values) - 1, math.ceil(q * len(values)) - 1))]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class Metrics:
+    """In-memory samples and counters keyed by metric name + labels
+
+    observe() keeps every sample so exact percentiles can be reported at the
+    end of the run (a full run is tens of thousands of samples); inc() is a
+    plain counter. Scrapers only touch this through BaseScraper.metrics,
+    which stays None when metrics are disabled.
+    """
+
+    def __init__(self):
+        self._samples: Dict[str, Dict[Labels, List[float]]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._samples.setdefault(name, {}).setdefault(key, []).append(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def summary(self, name: str, by: Iterable[str] = ()) -> Dict[Labels, Dict[str, float]]:
+        """count/sum/p50/p95/p99 of one metric, grouped by a subset of its labels"""
+        by = tuple(by)
+        groups: Dict[Labels, List[float]] = {}
+        with self._lock:
+            for key, values in self._samples.get(name, {}).items():
+                group = tuple((k, v) for k, v in key if k in by)
+                groups.setdefault(group, []).extend(values)
+        result = {}
+        for group, values in groups.items():
+            values.sort()
+            stats = {'count': len(values), 'sum': sum(values)}
+            for q in QUANTILES:
+                stats[f"p{int(q * 100)}"] = percentile(values, q)
+            result[group] = stats
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        """Everything, with full label sets, as plain JSON-able data"""
+        with self._lock:
+            names = list(self._samples)
+            counters = {name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                        for name, series in self._counters.items()}
+        summaries = {}
+        for name in names:
+            with self._lock:
+                keys = list(self._samples[name])
+            label_names = {k for key in keys for k, _ in key}
+            summaries[name] = [dict(stats, labels=dict(group))
+                               for group, stats in self.summary(name, label_names).items()]
+        return {'summaries': summaries, 'counters': counters}
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (summaries + counters)"""
+        def fmt(labels: Dict[str, str], extra: Optional[Dict[str, str]] = None) -> str:
+            labels = dict(labels, **(extra or {}))
+            if not labels:
+                return ''
+            return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items())) + '}'
+
+        report = self.report()
+        lines = []
+        for name, groups in sorted(report['summaries'].items()):
+            lines.append(f"# TYPE {name} summary")
+            for stats in groups:
+                labels = stats['labels']
+                for q in QUANTILES:
+                    lines.append(f"{name}{fmt(labels, {'quantile': str(q)})} {stats[f'p{int(q * 100)}']:.6g}")
+                lines.append(f"{name}_sum{fmt(labels)} {stats['sum']:.6g}")
+                lines.append(f"{name}_count{fmt(labels)} {stats['count']}")
+        for name, series in sorted(report['counters'].items()):
+            lines.append(f"# TYPE {name} counter")
+            for item in series:
+                lines.append(f"{name}{fmt(item['labels'])} {item['value']}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, out_dir: Path, extra: Optional[Dict[str, Any]] = None):
+        """run.json + scraper.prom (the textfile collector picks up the .prom file)"""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        report = dict(extra or {}, **self.report())
+        for name, body in (('run.json', json.dumps(report, ensure_ascii=False, indent=2)),
+                           ('scraper.prom', self.prometheus())):
+            tmp = out_dir / f".{name}.tmp"
+            tmp.write_text(body, encoding='utf-8')
+            os.replace(tmp, out_dir / name)
@@ -0,0 +1,199 @@
+"""Publish - نسخة مضغوطة من data/ للتطبيق (JSON مصغّر + gzip + brotli + schema مختصر اختياري)"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import gzip
+import json
+import os
+import threading
+
+from .log import get_logger
+
+try:
+    import brotli
+except ImportError:  # اختياري - من غيره بنكتب .gz بس
+    brotli = None
+
+log = get_logger('Publish')
+
+# الـ schema المختصر بيعلن عن نفسه في كل ملف عشان التطبيق يعرف يفكه
+COMPACT_SCHEMA = 'compact-1'
+
+# قيم بتتكرر كتير بين المسلسلات في series.json
+_CATALOG_INTERNED = ('genres', 'tags', 'country', 'language', 'quality', 'duration', 'status')
+
+
+class StringTable:
+    """Maps repeated strings to indexes into one shared list"""
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def ref(self, value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        if value not in self._index:
+            self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return self._index[value]
+
+
+def compact_episode(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Episode file with server strings interned and identical server entries dropped
+
+    series_title is left out (it is in the series file); every string value
+    inside a server entry becomes an index into `strings`.
+    """
+    table = StringTable()
+    servers = {}
+    for kind, entries in data.get('servers', {}).items():
+        seen = set()
+        packed = []
+        for entry in entries:
+            key = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+            if key in seen:
+                continue
+            seen.add(key)
+            packed.append({k: table.ref(v) for k, v in entry.items()})
+        servers[kind] = packed
+    compact = {k: v for k, v in data.items() if k not in ('servers', 'series_title')}
+    compact.update({'schema': COMPACT_SCHEMA, 'strings': table.strings, 'servers': servers})
+    return compact
+
+
+def compact_catalog(data: Dict[str, Any]) -> Dict[str, Any]:
+    """series.json with genres/tags/country/... interned across all series"""
+    table = StringTable()
+    series = []
+    for item in data.get('series', []):
+        packed = dict(item)
+        for key in _CATALOG_INTERNED:
+            value = packed.get(key)
+            if isinstance(value, list):
+                packed[key] = [table.ref(v) for v in value]
+            elif isinstance(value, str):
+                packed[key] = table.ref(value)
+        series.append(packed)
+    compact = {k: v for k, v in data.items() if k != 'series'}
+    compact.update({'schema': COMPACT_SCHEMA, 'strings': table.strings, 'series': series})
+    return compact
+
+
+def file_class(rel_path: Path) -> str:
+    """catalog / series / episodes - used to group the size report"""
+    return rel_path.parts[0] if len(rel_path.parts) > 1 else 'catalog'
+
+
+class Publisher:
+    """Writes the client-facing copy of the data tree into out_dir
+
+    Every published file gets a minified .json plus .json.gz (and .json.br
+    when the brotli package is installed). Files are only rewritten when
+    their bytes change; gzip output uses a fixed mtime so unchanged content
+    compresses to identical bytes and stays out of the git diff.
+    """
+
+    def __init__(self, data_dir: Path, out_dir: Path, use_gzip: bool = True,
+                 use_brotli: bool = True, compact: bool = False):
+        self.data_dir = Path(data_dir)
+        self.out_dir = Path(out_dir)
+        self.use_gzip = use_gzip
+        self.use_brotli = use_brotli and brotli is not None
+        self.compact = compact
+        self.fresh = not self.out_dir.exists()  # مفيش نسخة منشورة قبل كده
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        if use_brotli and brotli is None:
+            log.warning("brotli not installed - writing .gz siblings only")
+
+    def target(self, source: Path) -> Path:
+        return self.out_dir / Path(source).resolve().relative_to(self.data_dir.resolve())
+
+    def is_published(self, source: Path) -> bool:
+        return self.target(source).exists()
+
+    def _encode(self, rel_path: Path, data: Any) -> bytes:
+        if self.compact:
+            if rel_path.parts[0] == 'episodes':
+                data = compact_episode(data)
+            elif rel_path.parts[0] == 'bundles':
+                data = dict(data, episodes=[compact_episode(ep) for ep in data.get('episodes', [])])
+            elif rel_path == Path('series.json'):
+                data = compact_catalog(data)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def _write_if_changed(self, path: Path, body: bytes) -> bool:
+        try:
+            if path.stat().st_size == len(body) and path.read_bytes() == body:
+                return False
+        except OSError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, path)
+        return True
+
+    def publish(self, source: Path, data: Any) -> Dict[str, int]:
+        """Publish one data file; returns its sizes per variant"""
+        target = self.target(source)
+        rel_path = target.relative_to(self.out_dir)
+        pretty = len(json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+        body = self._encode(rel_path, data)
+        sizes = {'source': pretty, 'min': len(body)}
+        self._write_if_changed(target, body)
+        if self.use_gzip:
+            packed = gzip.compress(body, compresslevel=9, mtime=0)
+            sizes['gz'] = len(packed)
+            self._write_if_changed(target.with_name(target.name + '.gz'), packed)
+        if self.use_brotli:
+            packed = brotli.compress(body, quality=11)
+            sizes['br'] = len(packed)
+            self._write_if_changed(target.with_name(target.name + '.br'), packed)
+
+        with self._lock:
+            stats = self._stats.setdefault(file_class(rel_path), {'files': 0})
+            stats['files'] += 1
+            for variant, size in sizes.items():
+                stats[variant] = stats.get(variant, 0) + size
+        return sizes
+
+    def publish_tree(self) -> int:
+        """Publish every series/episode file plus series.json"""
+        sources = [self.data_dir / "series.json"]
+        sources += sorted((self.data_dir / "series").glob('*.json'))
+        sources += sorted((self.data_dir / "episodes").glob('*.json'))
+        sources += sorted((self.data_dir / "bundles").glob('*.json'))
+        sources += sorted((self.data_dir / "catalog").glob('*.json'))
+        published = 0
+        for source in sources:
+            try:
+                with open(source, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            self.publish(source, data)
+            published += 1
+        return published
+
+    def remove(self, source: Path):
+        """Drop the published copies of a data file that no longer exists"""
+        target = self.target(source)
+        for path in (target, target.with_name(target.name + '.gz'), target.with_name(target.name + '.br')):
+            if path.exists():
+                path.unlink()
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+def format_savings(stats: Dict[str, int]) -> Tuple[str, Optional[float]]:
+    """'12.3 MB -> 1.2 MB min, 0.3 MB gz' and the saved ratio of the smallest variant"""
+    mb = lambda n: f"{n / 1024 / 1024:.2f} MB"
+    parts = [f"{mb(stats[v])} {v}" for v in ('min', 'gz', 'br') if v in stats]
+    smallest = min(stats[v] for v in ('min', 'gz', 'br') if v in stats)
+    saved = 1 - smallest / stats['source'] if stats['source'] else None
+    return f"{mb(stats['source'])} -> {', '.join(parts)}", saved
@@ -0,0 +1,93 @@
+"""Scheduler - كل مسلسل ليه ميعاد زيارة جاي حسب حالته وآخر حلقة ومعدل تحديثه"""
+
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import threading
+
+from .dates import parse_arabic_date, parse_iso, to_iso, utc_now
+from .writer import JsonWriter
+
+# عمر آخر حلقة بالأيام -> كل قد إيه نزور المسلسل (بالساعات)
+AGE_TIERS = ((3, 6), (10, 12), (30, 24), (90, 72))
+
+
+class Scheduler:
+    """Per-series next-due times persisted in data/state/schedule.json
+
+    The poll interval starts from the age of the newest episode (a series
+    that got an episode this week is checked every few hours, one silent
+    for months every few days), is tightened to half the observed gap
+    between changes, and completed series always get max_hours. A series
+    is due when next_due is within `slack` of now, so cron jitter does not
+    push it to the following run.
+    """
+
+    def __init__(self, path: Path, writer: Optional[JsonWriter] = None, min_hours: float = 6,
+                 max_hours: float = 168, slack_minutes: float = 30):
+        self.path = Path(path)
+        self.writer = writer or JsonWriter()
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+        self.slack = timedelta(minutes=slack_minutes)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._state: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+
+    def entry(self, series_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._state.get(series_id, {}))
+
+    def is_due(self, series_id: str, now: Optional[datetime] = None) -> bool:
+        next_due = parse_iso(self.entry(series_id).get('next_due'))
+        return next_due is None or (now or utc_now()) + self.slack >= next_due
+
+    def interval_hours(self, series_data: Dict[str, Any], entry: Dict[str, Any],
+                       now: Optional[datetime] = None) -> float:
+        if series_data.get('status') == 'completed':
+            return self.max_hours
+        episodes = series_data.get('episodes') or []
+        last_date = parse_arabic_date(episodes[-1].get('date_added', '')) if episodes else None
+        hours = self.max_hours
+        if last_date:
+            age_days = ((now or utc_now()) - last_date).total_seconds() / 86400
+            hours = next((h for days, h in AGE_TIERS if age_days <= days), self.max_hours)
+        cadence = entry.get('cadence_hours')
+        if cadence:
+            hours = min(hours, cadence / 2)
+        return max(self.min_hours, min(self.max_hours, hours))
+
+    def record(self, series_id: str, series_data: Dict[str, Any], now: Optional[datetime] = None):
+        """Store the outcome of a visit and compute the next due time"""
+        now = now or utc_now()
+        with self._lock:
+            entry = dict(self._state.get(series_id, {}))
+        episodes = series_data.get('total_episodes', 0)
+        changed = 'episodes' in entry and episodes != entry['episodes']
+        if changed:
+            last_change = parse_iso(entry.get('last_change'))
+            if last_change:
+                gap = (now - last_change).total_seconds() / 3600
+                previous = entry.get('cadence_hours')
+                entry['cadence_hours'] = round(gap if previous is None else 0.5 * previous + 0.5 * gap, 1)
+            entry['last_change'] = to_iso(now)
+        entry['episodes'] = episodes
+        entry['checks'] = entry.get('checks', 0) + 1
+        entry['last_checked'] = to_iso(now)
+        entry['interval_hours'] = round(self.interval_hours(series_data, entry, now), 1)
+        entry['next_due'] = to_iso(now + timedelta(hours=entry['interval_hours']))
+        with self._lock:
+            self._state[series_id] = entry
+
+    def save(self):
+        with self._lock:
+            state = {k: self._state[k] for k in sorted(self._state)}
+        self.writer.write(self.path, state)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._state.items()}
@@ -0,0 +1,422 @@
+"""Storage - واجهة تخزين المسلسلات والحلقات (ملفات JSON أو SQLite)"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Set
+from pathlib import Path
+import copy
+import json
+import sqlite3
+import threading
+
+from .log import get_logger
+from .writer import JsonWriter, content_hash, strip_volatile
+
+log = get_logger('Storage')
+
+
+class Storage(ABC):
+    """What SeriesScraper needs from a backend
+
+    save_* return True when the stored content actually changed, so callers
+    can tell real updates from no-op rewrites.
+    """
+
+    @abstractmethod
+    def load_series(self, series_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def save_series(self, series_id: str, data: Dict[str, Any]) -> bool:
+        pass
+
+    @abstractmethod
+    def load_episode(self, series_id: str, ep_num: int) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def save_episode(self, series_id: str, ep_num: int, data: Dict[str, Any]) -> bool:
+        pass
+
+    @abstractmethod
+    def load_catalog(self) -> Optional[Dict[str, Any]]:
+        """series.json content"""
+        pass
+
+    @abstractmethod
+    def save_catalog(self, data: Dict[str, Any]) -> bool:
+        pass
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group the writes of one series; backends with transactions commit them together"""
+        yield
+
+    def summary(self) -> Dict[str, int]:
+        return {}
+
+    def close(self):
+        pass
+
+
+class JsonStorage(Storage):
+    """The file layout: data/series.json, data/series/<id>.json and the episodes
+
+    Episodes live either in one file each (data/episodes/<id>_<nn>.json,
+    layout='files') or in one bundle per series (data/bundles/<id>.json,
+    layout='bundles'). Reads understand both layouts whichever is active.
+    With bundles, compat_files keeps writing the per-episode files for
+    clients that have not moved yet, and a series' episodes saved inside
+    batch() are written as a single atomic bundle write.
+    """
+
+    def __init__(self, data_dir: Path, writer: Optional[JsonWriter] = None, publisher=None,
+                 changes=None, layout: str = 'files', compat_files: bool = True):
+        self.data_dir = Path(data_dir)
+        self.writer = writer or JsonWriter()
+        self.publisher = publisher  # utils.publish.Publisher - نسخة التطبيق المضغوطة
+        self.changes = changes      # utils.changes.ChangeLog - سجل التغييرات للتطبيق
+        self.bundled = layout == 'bundles'
+        self.compat_files = compat_files
+        self._local = threading.local()
+        (self.data_dir / "series").mkdir(parents=True, exist_ok=True)
+        (self.data_dir / "episodes").mkdir(parents=True, exist_ok=True)
+        if self.bundled:
+            (self.data_dir / "bundles").mkdir(parents=True, exist_ok=True)
+
+    def series_path(self, series_id: str) -> Path:
+        return self.data_dir / "series" / f"{series_id}.json"
+
+    def episode_path(self, series_id: str, ep_num: int) -> Path:
+        return self.data_dir / "episodes" / f"{series_id}_{ep_num:02d}.json"
+
+    def bundle_path(self, series_id: str) -> Path:
+        return self.data_dir / "bundles" / f"{series_id}.json"
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_file(self, path: Path, data: Dict[str, Any]) -> bool:
+        """Write any client-facing file under data_dir (also publishes and records the change)"""
+        written = self.writer.write(path, data)
+        if written:
+            log.info("Saved %s", path, extra={'event': 'file_saved'})
+            if self.changes:
+                self.changes.record(path, data)
+        if self.publisher and (written or not self.publisher.is_published(path)):
+            self.publisher.publish(path, data)
+        return written
+
+    def remove_file(self, path: Path):
+        if self.publisher:
+            self.publisher.remove(path)
+        if self.changes:
+            self.changes.record_removed(path)
+        Path(path).unlink()
+        log.info("Removed %s", path)
+
+    def load_series(self, series_id: str) -> Optional[Dict[str, Any]]:
+        return self._read(self.series_path(series_id))
+
+    def save_series(self, series_id: str, data: Dict[str, Any]) -> bool:
+        return self.write_file(self.series_path(series_id), data)
+
+    # === الحلقات: ملف لكل حلقة أو bundle لكل مسلسل ===
+
+    def _episode_files(self, series_id: str) -> Dict[int, Dict[str, Any]]:
+        episodes = {}
+        for path in (self.data_dir / "episodes").glob(f"{series_id}_*.json"):
+            number = path.stem[len(series_id) + 1:]
+            if number.isdigit():
+                data = self._read(path)
+                if data:
+                    episodes[int(number)] = data
+        return episodes
+
+    def _bundle(self, series_id: str) -> Dict[int, Dict[str, Any]]:
+        """Episodes of one series from its bundle (cached per thread for the series in progress)"""
+        cached = getattr(self._local, 'bundle', None)
+        if cached and cached[0] == series_id:
+            return cached[1]
+        data = self._read(self.bundle_path(series_id))
+        if data is not None:
+            episodes = {ep['episode_number']: ep for ep in data.get('episodes', [])}
+        elif self.bundled:
+            # لسه متعملش bundle للمسلسل ده - نبدأ من ملفات الحلقات القديمة
+            episodes = self._episode_files(series_id)
+        else:
+            episodes = {}
+        self._local.bundle = (series_id, episodes)
+        return episodes
+
+    def _write_bundle(self, series_id: str, episodes: Dict[int, Dict[str, Any]]) -> bool:
+        self._local.bundle = (series_id, episodes)
+        return self.write_file(self.bundle_path(series_id), {
+            'series_id': series_id, 'episodes': [episodes[n] for n in sorted(episodes)]
+        })
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        if not self.bundled or getattr(self._local, 'pending', None) is not None:
+            yield
+            return
+        self._local.pending = {}
+        try:
+            yield
+            for series_id, episodes in self._local.pending.items():
+                self._write_bundle(series_id, episodes)
+        finally:
+            self._local.pending = None
+
+    def _bundled_episode(self, series_id: str, ep_num: int) -> Optional[Dict[str, Any]]:
+        # نسخة - الكاش لازم يفضل زي اللي على الديسك عشان save_episode تقارن بيه
+        episode = self._bundle(series_id).get(ep_num)
+        return copy.deepcopy(episode) if episode else None
+
+    def load_episode(self, series_id: str, ep_num: int) -> Optional[Dict[str, Any]]:
+        if self.bundled:
+            return self._bundled_episode(series_id, ep_num) or self._read(self.episode_path(series_id, ep_num))
+        return self._read(self.episode_path(series_id, ep_num)) or self._bundled_episode(series_id, ep_num)
+
+    def save_episode(self, series_id: str, ep_num: int, data: Dict[str, Any]) -> bool:
+        if not self.bundled:
+            return self.write_file(self.episode_path(series_id, ep_num), data)
+
+        pending = getattr(self._local, 'pending', None)
+        if pending is not None:
+            episodes = pending.setdefault(series_id, dict(self._bundle(series_id)))
+        else:
+            episodes = dict(self._bundle(series_id))
+        previous = episodes.get(ep_num)
+        changed = previous is None or strip_volatile(previous) != strip_volatile(data)
+        episodes[ep_num] = data
+        if self.compat_files:
+            self.write_file(self.episode_path(series_id, ep_num), data)
+        if pending is None:
+            self._write_bundle(series_id, episodes)
+        return changed
+
+    def rebuild_bundles(self, missing_only: bool = False) -> int:
+        """Write the bundle of every series in data/series/ from its episode files
+
+        Bundles are otherwise only written when a series' episodes are saved,
+        so finished and unchanged series would never get one. missing_only
+        skips series that already have a bundle (the cheap check scrape_all
+        runs every time). Returns the number of bundles written.
+        """
+        if not self.bundled:
+            return 0
+        written = 0
+        for path in sorted((self.data_dir / "series").glob("*.json")):
+            series_id = path.stem
+            if missing_only and self.bundle_path(series_id).exists():
+                continue
+            bundle = self._read(self.bundle_path(series_id)) or {}
+            # ملفات الحلقات هي الأساس، واللي في الـ bundle أحدث منها لو موجود
+            episodes = self._episode_files(series_id)
+            episodes.update({ep['episode_number']: ep for ep in bundle.get('episodes', [])})
+            if episodes and self._write_bundle(series_id, episodes):
+                written += 1
+        self._local.bundle = None
+        return written
+
+    def load_catalog(self) -> Optional[Dict[str, Any]]:
+        return self._read(self.data_dir / "series.json")
+
+    def save_catalog(self, data: Dict[str, Any]) -> bool:
+        return self.write_file(self.data_dir / "series.json", data)
+
+    def summary(self) -> Dict[str, int]:
+        return self.writer.summary()
+
+
+class SqliteStorage(Storage):
+    """SQLite backend with indexed lookups by series id, episode number and source
+
+    Rows hold the same JSON documents the file layout uses, plus a content
+    hash so unchanged documents are not rewritten. One connection is shared
+    by all workers behind a lock; batch() wraps a series' writes in a single
+    transaction. export_json() regenerates the file layout for the app.
+    episode_sources is indexed by source for querying the database directly
+    (sqlite3 .cache/series.db); the scraper itself only writes it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS series (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            content_hash TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS episodes (
+            series_id TEXT NOT NULL,
+            number INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            PRIMARY KEY (series_id, number)
+        );
+        CREATE TABLE IF NOT EXISTS episode_sources (
+            series_id TEXT NOT NULL,
+            number INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            PRIMARY KEY (series_id, number, source)
+        );
+        CREATE INDEX IF NOT EXISTS idx_episode_sources_source ON episode_sources (source, series_id);
+        CREATE TABLE IF NOT EXISTS catalog (
+            key TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.RLock()
+        self._in_batch = False
+        self.written = 0
+        self.skipped = 0
+        self.dirty_series: Set[str] = set()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        with self._lock:
+            if self._in_batch:
+                yield
+                return
+            self._conn.execute('BEGIN')
+            self._in_batch = True
+            try:
+                yield
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            else:
+                self._conn.execute('COMMIT')
+            finally:
+                self._in_batch = False
+
+    def _load(self, query: str, params: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _changed(self, query: str, params: tuple, new_hash: str) -> bool:
+        row = self._conn.execute(query, params).fetchone()
+        if row and row[0] == new_hash:
+            self.skipped += 1
+            return False
+        self.written += 1
+        return True
+
+    def load_series(self, series_id: str) -> Optional[Dict[str, Any]]:
+        return self._load('SELECT data FROM series WHERE id = ?', (series_id,))
+
+    def save_series(self, series_id: str, data: Dict[str, Any]) -> bool:
+        new_hash = content_hash(data)
+        with self._lock:
+            if not self._changed('SELECT content_hash FROM series WHERE id = ?', (series_id,), new_hash):
+                return False
+            self._conn.execute('INSERT OR REPLACE INTO series (id, data, content_hash) VALUES (?, ?, ?)',
+                               (series_id, json.dumps(data, ensure_ascii=False), new_hash))
+            self.dirty_series.add(series_id)
+        return True
+
+    def load_episode(self, series_id: str, ep_num: int) -> Optional[Dict[str, Any]]:
+        return self._load('SELECT data FROM episodes WHERE series_id = ? AND number = ?', (series_id, ep_num))
+
+    def save_episode(self, series_id: str, ep_num: int, data: Dict[str, Any]) -> bool:
+        new_hash = content_hash(data)
+        sources = {s.get('source') for kind in ('watch', 'download')
+                   for s in data.get('servers', {}).get(kind, []) if s.get('source')}
+        with self._lock, self.batch():
+            if not self._changed('SELECT content_hash FROM episodes WHERE series_id = ? AND number = ?',
+                                 (series_id, ep_num), new_hash):
+                return False
+            self._conn.execute(
+                'INSERT OR REPLACE INTO episodes (series_id, number, data, content_hash) VALUES (?, ?, ?, ?)',
+                (series_id, ep_num, json.dumps(data, ensure_ascii=False), new_hash))
+            self._conn.execute('DELETE FROM episode_sources WHERE series_id = ? AND number = ?',
+                               (series_id, ep_num))
+            self._conn.executemany(
+                'INSERT INTO episode_sources (series_id, number, source) VALUES (?, ?, ?)',
+                [(series_id, ep_num, source) for source in sorted(sources)])
+            self.dirty_series.add(series_id)
+        return True
+
+    def load_catalog(self) -> Optional[Dict[str, Any]]:
+        return self._load("SELECT data FROM catalog WHERE key = 'series'", ())
+
+    def save_catalog(self, data: Dict[str, Any]) -> bool:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO catalog (key, data) VALUES ('series', ?)",
+                               (json.dumps(data, ensure_ascii=False),))
+        return True
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM series LIMIT 1').fetchone() is None
+
+    # === استيراد وتصدير ملفات JSON ===
+
+    def import_json(self, source: JsonStorage) -> int:
+        """Load an existing JSON tree into the database; returns series imported"""
+        imported = 0
+        for path in sorted((source.data_dir / "series").glob('*.json')):
+            series_id = path.stem
+            series_data = source.load_series(series_id)
+            if not series_data:
+                continue
+            with self.batch():
+                self.save_series(series_id, series_data)
+                for ep in series_data.get('episodes', []):
+                    ep_data = source.load_episode(series_id, ep['number'])
+                    if ep_data:
+                        self.save_episode(series_id, ep['number'], ep_data)
+            imported += 1
+        catalog = source.load_catalog()
+        if catalog:
+            self.save_catalog(catalog)
+        # الاستيراد مش جزء من إحصائيات التشغيل ومش محتاج يتصدّر تاني
+        self.dirty_series.clear()
+        self.written = self.skipped = 0
+        return imported
+
+    def export_json(self, target: JsonStorage, series_ids: Optional[Set[str]] = None) -> int:
+        """Write the Android app's JSON layout from the database
+
+        Only series_ids are exported when given (e.g. the series changed in
+        this run); the target's writer skips files that are already current.
+        """
+        with self._lock:
+            if series_ids is None:
+                series_ids = {row[0] for row in self._conn.execute('SELECT id FROM series')}
+        for series_id in sorted(series_ids):
+            series_data = self.load_series(series_id)
+            if not series_data:
+                continue
+            with self._lock:
+                rows = self._conn.execute('SELECT number, data FROM episodes WHERE series_id = ?',
+                                          (series_id,)).fetchall()
+            with target.batch():
+                target.save_series(series_id, series_data)
+                for number, data in rows:
+                    target.save_episode(series_id, number, json.loads(data))
+        catalog = self.load_catalog()
+        if catalog:
+            target.save_catalog(catalog)
+        return len(series_ids)
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {'written': self.written, 'skipped': self.skipped}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
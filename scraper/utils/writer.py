@@ -0,0 +1,77 @@
+"""JSON Writer - كتابة ذرية للملفات مع تخطي الملفات اللي محتواها متغيرش"""
+
+from typing import Any, Dict, Iterable
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+
+# مفاتيح بتتغير كل تشغيل ومش بتعتبر تغيير في المحتوى
+VOLATILE_KEYS = ('last_updated',)
+
+
+def strip_volatile(data: Any, volatile_keys: Iterable[str] = VOLATILE_KEYS) -> Any:
+    """Copy of data without volatile keys, at any depth"""
+    if isinstance(data, dict):
+        return {k: strip_volatile(v, volatile_keys) for k, v in data.items() if k not in volatile_keys}
+    if isinstance(data, list):
+        return [strip_volatile(v, volatile_keys) for v in data]
+    return data
+
+
+def content_hash(data: Any, volatile_keys: Iterable[str] = VOLATILE_KEYS) -> str:
+    """Stable hash of the canonical (non-volatile) content"""
+    canonical = json.dumps(strip_volatile(data, volatile_keys), ensure_ascii=False,
+                           sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class JsonWriter:
+    """Writes JSON files only when their canonical content changed
+
+    Content is compared with what is already on disk after dropping
+    volatile keys, so a fresh last_updated alone never rewrites a file.
+    Writes go to a temp file in the same directory and are renamed into
+    place, so readers never see a partial file.
+    """
+
+    def __init__(self, volatile_keys: Iterable[str] = VOLATILE_KEYS, indent: int = 2):
+        self.volatile_keys = tuple(volatile_keys)
+        self.indent = indent
+        self.written = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def unchanged(self, path: Path, data: Any) -> bool:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return strip_volatile(existing, self.volatile_keys) == strip_volatile(data, self.volatile_keys)
+
+    def write(self, path: Path, data: Any) -> bool:
+        """Write data to path; returns False if the file was already up to date"""
+        path = Path(path)
+        if self.unchanged(path, data):
+            with self._lock:
+                self.skipped += 1
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=self.indent)
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        with self._lock:
+            self.written += 1
+        return True
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {'written': self.written, 'skipped': self.skipped}